@@ -5,4 +5,17 @@ Security Audit Checker Package
 
 __version__ = "1.0.0"
 __author__ = "HPC Data Team"
-__description__ = "A security audit checker tool"
\ No newline at end of file
+__description__ = "A security audit checker tool"
+
+from ._cython import cython_enabled
+
+# 优先使用Cython编译的应用模块，设置 DBSA_CYTHON=False 强制使用纯Python实现
+if cython_enabled():
+    try:
+        from .app_c import App, main
+    except ImportError:
+        from .app import App, main
+else:
+    from .app import App, main
+
+__all__ = ["App", "main"]
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cython编译模块开关
+"""
+
+import os
+
+
+def cython_enabled() -> bool:
+    """是否使用Cython编译的模块，设置 DBSA_CYTHON=False 强制使用纯Python实现"""
+    return os.environ.get("DBSA_CYTHON", "True").lower() not in ("false", "0", "no")
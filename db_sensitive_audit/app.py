@@ -1,15 +1,66 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+# cython: boundscheck=False, wraparound=False
 """
 DB Sensitive Audit Application
 数据库敏感信息审计应用程序
 """
 
 import sys
-import os
-import argparse
-from typing import List, Optional
-from .database_auditor import DatabaseAuditor
+import functools
+import itertools
+from types import SimpleNamespace
+from typing import Iterable, List, Optional
+
+# audit 命令参数表: 参数 -> (属性名, 是否需要值)
+_AUDIT_FLAGS = {
+    '-f': ('file', True),
+    '--file': ('file', True),
+    '-c': ('config', True),
+    '--config': ('config', True),
+    '-i': ('interactive', False),
+    '--interactive': ('interactive', False),
+    '-o': ('output', True),
+    '--output': ('output', True),
+}
+
+# 互斥的配置来源参数
+_SOURCE_ATTRS = ('file', 'config', 'interactive')
+
+_HELP_FLAGS = ('-h', '--help')
+
+# 固定输出文本，导入时拼接一次，每次整体写出
+_BANNER_RUN_HEADER = '\n'.join([
+    "数据库敏感信息审计工具",
+    "=" * 50,
+]) + '\n'
+
+_BANNER_HELP = '\n'.join([
+    "使用方法:",
+    "  python -m checker.app audit [选项]",
+    "",
+    "选项:",
+    "  -f, --file FILE       从文件读取配置",
+    "  -c, --config CONFIG   直接提供配置字符串",
+    "  -i, --interactive     交互式输入配置",
+    "  -o, --output DIR      输出目录 (默认: audit_reports)",
+    "  -h, --help            显示帮助信息",
+    "",
+    "配置格式:",
+    "  datasource_name,ip,port,username,password",
+    "  每行一个数据源，使用逗号分隔",
+    "",
+    "示例:",
+    "  python -m checker.app audit -c \"test_db,localhost,3306,root,123456\"",
+]) + '\n'
+
+_BANNER_INTERACTIVE = '\n'.join([
+    "",
+    "交互式配置模式",
+    "请按照格式输入数据源配置: datasource_name,ip,port,username,password",
+    "输入空行结束配置",
+    "-" * 50,
+]) + '\n'
 
 
 class App:
@@ -18,7 +69,12 @@ class App:
     def __init__(self):
         self.name = "DB Sensitive Audit"
         self.version = "1.0.0"
-        self.auditor = DatabaseAuditor()
+    
+    @functools.cached_property
+    def auditor(self):
+        """数据库审计器，首次使用时才导入和创建，帮助和参数错误路径无需加载"""
+        from .database_auditor import DatabaseAuditor
+        return DatabaseAuditor()
     
     def run(self, args: Optional[List[str]] = None) -> None:
         """运行应用程序
@@ -26,68 +82,78 @@ class App:
         Args:
             args: 命令行参数列表
         """
-        print(f"{self.name} v{self.version}")
-        print("数据库敏感信息审计工具")
-        print("=" * 50)
+        sys.stdout.write(f"{self.name} v{self.version}\n{_BANNER_RUN_HEADER}")
         
         if not args:
             self.show_help()
             return
         
-        parser = self.create_parser()
-        try:
-            parsed_args = parser.parse_args(args)
+        if args[0] != 'audit':
+            if args[0] not in _HELP_FLAGS:
+                print("未知命令，请使用 --help 查看帮助")
+            self.show_help()
+            return
+        
+        parsed_args = self.parse_audit_args(args[1:])
+        if parsed_args is not None:
             self.handle_command(parsed_args)
-        except SystemExit:
-            pass
     
-    def create_parser(self) -> argparse.ArgumentParser:
-        """创建命令行参数解析器"""
-        parser = argparse.ArgumentParser(
-            description="数据库敏感信息审计工具",
-            formatter_class=argparse.RawDescriptionHelpFormatter,
-            epilog="""
-使用示例:
-  # 从配置文件审计
-  python -m checker.app audit -f config.txt
-  
-  # 从命令行参数审计
-  python -m checker.app audit -c "db1,localhost,3306,root,password"
-  
-  # 交互式输入配置
-  python -m checker.app audit -i
-            """
-        )
-        
-        subparsers = parser.add_subparsers(dest='command', help='可用命令')
-        
-        # audit 命令
-        audit_parser = subparsers.add_parser('audit', help='执行数据库审计')
-        audit_group = audit_parser.add_mutually_exclusive_group(required=True)
-        audit_group.add_argument('-f', '--file', help='配置文件路径')
-        audit_group.add_argument('-c', '--config', help='配置字符串')
-        audit_group.add_argument('-i', '--interactive', action='store_true', help='交互式输入')
-        audit_parser.add_argument('-o', '--output', default='audit_reports', help='输出目录 (默认: audit_reports)')
-        
-        return parser
+    def parse_audit_args(self, args: List[str]) -> Optional[SimpleNamespace]:
+        """解析 audit 命令的参数
+        
+        Args:
+            args: audit 之后的参数列表
+            
+        Returns:
+            解析结果，参数错误或请求帮助时返回None
+        """
+        parsed = SimpleNamespace(command='audit', file=None, config=None,
+                                 interactive=False, output='audit_reports')
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg in _HELP_FLAGS:
+                self.show_help()
+                return None
+            
+            # 支持 --file=config.txt 形式
+            value = None
+            if arg.startswith('--') and '=' in arg:
+                arg, value = arg.split('=', 1)
+            
+            flag = _AUDIT_FLAGS.get(arg)
+            if flag is None:
+                print(f"错误: 无法识别的参数: {args[i]}")
+                return None
+            
+            attr, takes_value = flag
+            if not takes_value:
+                if value is not None:
+                    print(f"错误: 参数 {arg} 不接受值")
+                    return None
+                setattr(parsed, attr, True)
+            elif value is not None:
+                setattr(parsed, attr, value)
+            elif i + 1 < len(args):
+                i += 1
+                setattr(parsed, attr, args[i])
+            else:
+                print(f"错误: 参数 {arg} 需要一个值")
+                return None
+            i += 1
+        
+        # -f / -c / -i 必须且只能指定一个
+        source_count = sum(1 for attr in _SOURCE_ATTRS if getattr(parsed, attr))
+        if source_count != 1:
+            print("错误: 必须且只能指定 -f/--file、-c/--config、-i/--interactive 中的一个")
+            return None
+        
+        return parsed
     
     def show_help(self) -> None:
         """显示帮助信息"""
-        print("使用方法:")
-        print("  python -m checker.app audit [选项]")
-        print("")
-        print("选项:")
-        print("  -f, --file FILE       从文件读取配置")
-        print("  -c, --config CONFIG   直接提供配置字符串")
-        print("  -i, --interactive     交互式输入配置")
-        print("  -o, --output DIR      输出目录 (默认: audit_reports)")
-        print("")
-        print("配置格式:")
-        print("  datasource_name,ip,port,username,password")
-        print("  每行一个数据源，使用逗号分隔")
-        print("")
-        print("示例:")
-        print("  python -m checker.app audit -c \"test_db,localhost,3306,root,123456\"")
+        sys.stdout.write(_BANNER_HELP)
+        sys.stdout.flush()
     
     def handle_command(self, args) -> None:
         """处理命令"""
@@ -98,23 +164,35 @@ class App:
     
     def handle_audit_command(self, args) -> None:
         """处理审计命令"""
-        config_text = ""
-        
         if args.file:
             # 从文件读取配置
-            if not os.path.exists(args.file):
+            try:
+                f = open(args.file, 'r', encoding='utf-8', buffering=1 << 16)
+            except FileNotFoundError:
                 print(f"错误: 配置文件不存在: {args.file}")
                 return
-            
-            try:
-                with open(args.file, 'r', encoding='utf-8') as f:
-                    config_text = f.read()
-                print(f"从文件读取配置: {args.file}")
             except Exception as e:
                 print(f"错误: 读取配置文件失败: {str(e)}")
                 return
+            
+            # 逐行读取配置，读到一个数据源就开始审计一个
+            with f:
+                print(f"从文件读取配置: {args.file}")
+                config_lines = (line.rstrip('\n') for line in f if line.strip())
+                try:
+                    first_line = next(config_lines, None)
+                except (UnicodeDecodeError, OSError) as e:
+                    print(f"错误: 读取配置文件失败: {str(e)}")
+                    return
+                if first_line is None:
+                    print("错误: 配置为空")
+                    return
+                self.run_audit(itertools.chain((first_line,), self._guard_config_lines(config_lines)),
+                               args.output)
+            return
         
-        elif args.config:
+        config_text = ""
+        if args.config:
             # 直接使用配置字符串
             config_text = args.config
             print("使用命令行配置")
@@ -127,57 +205,83 @@ class App:
             print("错误: 配置为空")
             return
         
+        self.run_audit(config_text.splitlines(), args.output)
+    
+    def _guard_config_lines(self, config_lines: Iterable[str]) -> Iterable[str]:
+        """
+        逐行读取配置文件，读取失败（如编码错误）时停止读取后续配置，已读到的数据源照常审计并输出报告
+        
+        Args:
+            config_lines: 配置文件的行迭代器
+            
+        Yields:
+            配置行
+        """
+        try:
+            yield from config_lines
+        except (UnicodeDecodeError, OSError) as e:
+            print(f"错误: 读取配置文件失败，忽略后续配置: {str(e)}")
+    
+    def run_audit(self, config_lines: Iterable[str], output_dir: str) -> None:
+        """执行审计并输出结果
+        
+        Args:
+            config_lines: 数据源配置行
+            output_dir: 输出目录
+        """
         # 设置输出目录
-        self.auditor.output_dir = args.output
+        self.auditor.output_dir = output_dir
         self.auditor.ensure_output_dir()
         
         # 执行审计
-        print(f"开始执行数据库审计...")
-        print(f"输出目录: {args.output}")
-        print("-" * 50)
+        sys.stdout.write(f"开始执行数据库审计...\n输出目录: {output_dir}\n{'-' * 50}\n")
+        sys.stdout.flush()
         
         try:
-            excel_files = self.auditor.audit_multiple_datasources(config_text)
+            excel_files = self.auditor.audit_multiple_datasources_iter(config_lines)
             
-            print("\n" + "=" * 50)
-            print("审计完成！")
-            print(f"生成了 {len(excel_files)} 个Excel报告:")
-            for file_path in excel_files:
-                print(f"  📊 {file_path}")
+            summary = [
+                "",
+                "=" * 50,
+                "审计完成！",
+                f"生成了 {len(excel_files)} 个Excel报告:",
+            ]
+            summary.extend(f"  📊 {file_path}" for file_path in excel_files)
             
             if excel_files:
-                print(f"\n所有报告保存在目录: {args.output}")
+                summary.append(f"\n所有报告保存在目录: {output_dir}")
             else:
-                print("\n⚠️  没有成功生成任何报告，请检查配置和网络连接")
+                summary.append("\n⚠️  没有成功生成任何报告，请检查配置和网络连接")
+            
+            sys.stdout.write('\n'.join(summary) + '\n')
+            sys.stdout.flush()
                 
         except Exception as e:
             print(f"错误: 审计过程中发生异常: {str(e)}")
     
     def get_interactive_config(self) -> str:
         """交互式获取配置"""
-        print("\n交互式配置模式")
-        print("请按照格式输入数据源配置: datasource_name,ip,port,username,password")
-        print("输入空行结束配置")
-        print("-" * 50)
+        sys.stdout.write(_BANNER_INTERACTIVE)
+        sys.stdout.flush()
         
         config_lines = []
         line_number = 1
+        prompt_fmt = "数据源 {}: ".format
         
         while True:
             try:
-                line = input(f"数据源 {line_number}: ").strip()
+                line = input(prompt_fmt(line_number)).strip()
                 if not line:
                     break
                 
-                # 简单验证格式
-                parts = line.split(',')
-                if len(parts) < 5:
+                # 简单验证格式：5个字段至少需要4个逗号
+                if line.count(',') < 4:
                     print("  ⚠️  格式错误，请确保包含5个字段")
                     continue
                 
                 config_lines.append(line)
                 line_number += 1
-                print(f"  ✓ 已添加: {parts[0]}")
+                print(f"  ✓ 已添加: {line.split(',', 1)[0]}")
                 
             except KeyboardInterrupt:
                 print("\n\n操作已取消")
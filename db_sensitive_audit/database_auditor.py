@@ -10,18 +10,145 @@ import pandas as pd
 import os
 import random
 import logging
+import logging.handlers
 import re
 import json
-from typing import List, Dict, Tuple, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Tuple, Any, Optional, Iterable, Callable
+from datetime import datetime, date, time, timedelta
 import warnings
+import sys
+import threading
+import queue
+import atexit
+import functools
+import itertools
+import operator
+import copy
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ._cython import cython_enabled
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    from dbutils.pooled_db import PooledDB
+except ImportError:
+    PooledDB = None
+
+try:
+    import MySQLdb
+    import MySQLdb.cursors
+except ImportError:
+    MySQLdb = None
+
+# 优先使用C实现的mysqlclient驱动，未安装时使用纯Python的PyMySQL，两者接口兼容
+DB_DRIVER = MySQLdb if MySQLdb is not None else pymysql
+
+# 流式读取查询结果时每批获取的行数
+FETCH_BATCH_SIZE = 1000
+
+# 精确统计记录数时每条 UNION ALL 查询包含的表数
+COUNT_BATCH_SIZE = 100
+
+# 报告中的 是/否，全部使用同一个字符串对象
+YES = sys.intern('是')
+NO = sys.intern('否')
+
+# MySQL权限表中的 Y/N 转换为 是/否
+YN_MAP = {'Y': YES, 'N': NO}
+
+# 日期时间和二进制类型的值不可能是敏感文本，不做正则匹配
+NON_TEXT_TYPES = (date, time, timedelta, bytes, bytearray)
+
+# 优先使用Cython编译的字段名匹配器
+if cython_enabled():
+    try:
+        from .matcher_c import KeywordMatcher
+    except ImportError:
+        from .matcher import KeywordMatcher
+else:
+    from .matcher import KeywordMatcher
 
 # 忽略pandas警告
 warnings.filterwarnings('ignore')
 
+def _json_dumps(obj: Any) -> str:
+    """
+    序列化为紧凑的JSON字符串，中文原样输出
+    
+    安装了orjson时优先使用，遇到orjson不支持的值（如超过64位的整数）时回退到标准库。
+    日期时间、Decimal、bytes 等非JSON类型统一转换为 str()，两种实现输出一致。
+    
+    Args:
+        obj: 待序列化的对象
+        
+    Returns:
+        JSON字符串
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def _json_loads(text: Any) -> Any:
+    """
+    解析JSON字符串，安装了orjson时优先使用
+    
+    Args:
+        text: JSON字符串
+        
+    Returns:
+        解析结果
+    
+    Raises:
+        ValueError: 不是合法的JSON
+        TypeError: 参数类型不是字符串（仅标准库实现）
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+# 抽样失败时写入报告的JSON，与正常结果使用相同的紧凑格式
+SAMPLE_ERROR_JSON = _json_dumps({"error": "获取失败"})
+
+
+# 后台写日志的监听器，整个进程只创建一次
+_log_listener = None
+
+
 # 配置日志
 def setup_logger():
-    """配置日志系统"""
+    """
+    配置日志系统
+    
+    文件日志先放入队列立即返回，由后台线程写入；控制台日志同步输出，与程序的其他输出保持先后顺序；
+    重复调用时直接返回已配置好的logger，不会重复创建文件处理器。
+    """
+    global _log_listener
+    
+    # 创建logger
+    logger = logging.getLogger(__name__)
+    logger.setLevel(logging.INFO)
+    if _log_listener is not None:
+        return logger
+    
     # 确保logs目录存在
     logs_dir = "logs"
     if not os.path.exists(logs_dir):
@@ -35,14 +162,6 @@ def setup_logger():
         '%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
     )
     
-    # 创建logger
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.INFO)
-    
-    # 清除已有的处理器
-    if logger.handlers:
-        logger.handlers.clear()
-    
     # 文件处理器
     file_handler = logging.FileHandler(log_filename, encoding='utf-8')
     file_handler.setLevel(logging.INFO)
@@ -53,27 +172,128 @@ def setup_logger():
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
     
-    # 添加处理器
-    logger.addHandler(file_handler)
+    # 清除已有的处理器，文件输出走队列，控制台直接输出
+    if logger.handlers:
+        logger.handlers.clear()
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     logger.addHandler(console_handler)
     
+    # 后台线程负责实际的文件输出，进程退出时写完队列中剩余的日志
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, file_handler, respect_handler_level=True
+    )
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    
     return logger
 
 logger = setup_logger()
 
 
+@functools.lru_cache(maxsize=1)
+def _load_rules_file(rules_file: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    读取并解析规则文件，按文件修改时间缓存，文件未修改时不再重复读取
+    
+    Args:
+        rules_file: 规则文件路径
+        mtime_ns: 文件修改时间，作为缓存键的一部分
+        
+    Returns:
+        规则配置
+    """
+    with open(rules_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 表记录中保存敏感信息原始字典的内部字段，不写入报告
+SENSITIVE_INFO_DICT_KEY = '_sensitive_info_dict'
+
+# 报告中固定的sheet名称
+AUDIT_SHEET = '审计结果'
+USERS_SHEET = '用户权限'
+
+# 数据库sheet的列
+TABLE_COLUMNS = ['表名', '字段名和值', '敏感信息', '敏感信息确认', '总条数']
+
+# 审计结果sheet的列
+AUDIT_COLUMNS = ['风险类型', '风险等级', '检查项', '表名', '字段名', '敏感类型', '风险描述', '检测值', '记录总数', '建议']
+
+# 需要报告的高危权限，以及判断通配符主机风险的数据操作权限
+HIGH_RISK_PERMISSIONS = ['超级权限', '文件权限', '关闭权限', '重载权限', '进程权限', '授权权限', '复制从权限', '复制客户端权限']
+DATA_PERMISSIONS = ['查询权限', '插入权限', '更新权限', '删除权限']
+
+# 报告使用的xlsxwriter格式属性，生成报告时注册到workbook
+REPORT_FORMATS = {
+    'header': {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'},  # 表头
+    'red_bold': {'font_color': '#FF0000', 'bold': True},  # 红色加粗
+    'high_risk_row': {'bg_color': '#FFCCCC'},  # 浅红色背景
+    'medium_risk_row': {'bg_color': '#FFFFCC'},  # 浅黄色背景
+    'high_risk_level': {'font_color': '#CC0000', 'bold': True},  # 深红色字体
+    'medium_risk_level': {'font_color': '#FF6600', 'bold': True},  # 橙色字体
+    'link': {'font_color': '#0000FF', 'underline': 1},  # 超链接
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _excel_styles() -> Dict[str, Any]:
+    """
+    获取未安装xlsxwriter时openpyxl写入报告使用的样式对象，首次使用时创建，之后所有单元格共用
+    
+    Returns:
+        样式名 -> 样式对象
+    """
+    from openpyxl.styles import Font, PatternFill
+    
+    return {
+        'header_font': Font(bold=True),  # 表头加粗
+        'red_bold_font': Font(color="FF0000", bold=True),  # 红色加粗
+        'high_risk_fill': PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid"),  # 浅红色背景
+        'medium_risk_fill': PatternFill(start_color="FFFFCC", end_color="FFFFCC", fill_type="solid"),  # 浅黄色背景
+        'high_risk_font': Font(color="CC0000", bold=True),  # 深红色字体
+        'medium_risk_font': Font(color="FF6600", bold=True),  # 橙色字体
+        'link_font': Font(color="0000FF", underline="single"),  # 超链接
+    }
+
+
 class DatabaseAuditor:
     """数据库审计器类"""
     
-    def __init__(self, output_dir: str = "audit_reports"):
+    def __init__(self, output_dir: str = "audit_reports", sample_size: int = 10, max_workers: int = 8,
+                 approximate_counts: bool = True, max_db_workers: Optional[int] = None,
+                 max_datasource_workers: int = 16):
         """
         初始化审计器
         
         Args:
             output_dir: 输出目录
+            sample_size: 每张表随机抽样的记录数
+            max_workers: 单个数据源并发扫描使用的最大线程数（即最大数据库连接数）
+            approximate_counts: 是否使用information_schema中的估算记录数，False时执行COUNT(*)统计精确记录数
+            max_db_workers: 同时处理的最大数据库数，默认与 max_workers 相同
+            max_datasource_workers: 批量审计时同时审计的最大数据源数
         """
         self.output_dir = output_dir
+        self.sample_size = sample_size
+        self.max_workers = max_workers
+        self.approximate_counts = approximate_counts
+        self.max_db_workers = max_db_workers
+        self.max_datasource_workers = max_datasource_workers
+        
+        # 数据库驱动模块（MySQLdb 或 pymysql）
+        self._driver = DB_DRIVER
+        
+        # 安装了DBUtils时每个数据源使用一个连接池，连接关闭后放回池中复用；
+        # 配置中可能有多个数据源指向同一服务器和账号，共用连接池并记录正在审计的数量
+        self._pools = {}
+        self._pool_users = {}
+        self._pools_lock = threading.Lock()
         self.ensure_output_dir()
+        
+        # 规则只加载和编译一次，检测时直接复用
+        self._rules_config = self.load_sensitive_rules()
+        self._compile_rules(self._rules_config)
     
     def ensure_output_dir(self) -> None:
         """确保输出目录存在"""
@@ -88,14 +308,19 @@ class DatabaseAuditor:
         Returns:
             敏感信息检测规则配置
         """
+        rules_file = os.path.join("config", "sensitive_rules.json")
         try:
-            rules_file = os.path.join("config", "sensitive_rules.json")
-            if os.path.exists(rules_file):
-                with open(rules_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                logger.warning(f"敏感信息规则文件不存在: {rules_file}，使用默认规则")
-                return self._get_default_rules()
+            mtime_ns = os.stat(rules_file).st_mtime_ns
+        except FileNotFoundError:
+            logger.warning(f"敏感信息规则文件不存在: {rules_file}，使用默认规则")
+            return self._get_default_rules()
+        except OSError as e:
+            logger.error(f"加载敏感信息规则失败: {str(e)}，使用默认规则")
+            return self._get_default_rules()
+        
+        try:
+            # 返回副本，避免调用方修改缓存内容
+            return copy.deepcopy(_load_rules_file(rules_file, mtime_ns))
         except Exception as e:
             logger.error(f"加载敏感信息规则失败: {str(e)}，使用默认规则")
             return self._get_default_rules()
@@ -124,6 +349,120 @@ class DatabaseAuditor:
             }
         }
 
+    def _compile_rules(self, rules_config: Dict[str, Any]) -> None:
+        """
+        预编译敏感信息检测规则
+        
+        Args:
+            rules_config: 敏感信息检测规则配置
+        """
+        rules = rules_config.get("sensitive_rules", {})
+        settings = rules_config.get("settings", {})
+        
+        enabled_rules = settings.get("enabled_rules", [])
+        self._case_sensitive = settings.get("case_sensitive", False)
+        self._max_field_length = settings.get("max_field_length", 100)
+        
+        # 规则名 -> 预处理后的关键词和预编译的正则
+        self._compiled_rules = {}
+        for rule_name, rule_config in rules.items():
+            field_keywords = rule_config.get("field_keywords", [])
+            if not self._case_sensitive:
+                field_keywords = [keyword.lower() for keyword in field_keywords]
+            
+            patterns = []
+            for pattern in rule_config.get("regex_patterns", []):
+                try:
+                    patterns.append(re.compile(pattern))
+                except re.error as e:
+                    logger.warning(f"正则表达式错误 {pattern}: {str(e)}")
+            
+            self._compiled_rules[rule_name] = {
+                "field_keywords": field_keywords,
+                "patterns": patterns,
+                "combined_pattern": self._combine_patterns(patterns),
+                "enabled": rule_name in enabled_rules
+            }
+        
+        self._keyword_matcher = KeywordMatcher(
+            {rule_name: rule["field_keywords"] for rule_name, rule in self._compiled_rules.items() if rule["enabled"]},
+            case_sensitive=self._case_sensitive
+        )
+        self._pattern_set, self._pattern_owners = self._build_pattern_set()
+        
+        # 测试数据关键词合并为一个忽略大小写的正则，一次扫描完成判断
+        test_patterns = settings.get("test_patterns", [])
+        if settings.get("exclude_test_data", True) and test_patterns:
+            self._test_re = re.compile("|".join(map(re.escape, test_patterns)), re.IGNORECASE)
+        else:
+            self._test_re = None
+    
+    def _combine_patterns(self, patterns: List[re.Pattern]) -> Optional[re.Pattern]:
+        """
+        把同一规则的多个正则合并为一个分支正则，一次匹配即可判断是否命中任意一个
+        
+        Args:
+            patterns: 预编译的正则列表
+            
+        Returns:
+            合并后的正则，没有正则时返回None
+        """
+        if len(patterns) <= 1:
+            return patterns[0] if patterns else None
+        try:
+            return re.compile("|".join(f"(?:{pattern.pattern})" for pattern in patterns))
+        except re.error:
+            # 含有全局标志等无法合并的正则时，匹配时逐个尝试
+            return None
+    
+    def _build_pattern_set(self) -> Tuple[Any, List[str]]:
+        """
+        把所有启用规则的正则编译为一个RE2多模式匹配集合，一次扫描即可得到全部命中的规则
+        
+        Returns:
+            (RE2匹配集合, 模式编号 -> 规则名)，未安装google-re2或编译失败时返回(None, [])
+        """
+        if re2 is None:
+            return None, []
+        
+        try:
+            # MatchSet 锚定在字符串开头，与 re.match 语义一致
+            pattern_set = re2.Set.MatchSet()
+            pattern_owners = []
+            for rule_name, rule in self._compiled_rules.items():
+                if not rule["enabled"]:
+                    continue
+                for pattern in rule["patterns"]:
+                    pattern_set.Add(pattern.pattern)
+                    pattern_owners.append(rule_name)
+            pattern_set.Compile()
+            return pattern_set, pattern_owners
+        except Exception as e:
+            logger.warning(f"RE2多模式匹配初始化失败，使用标准正则匹配: {str(e)}")
+            return None, []
+    
+    def _match_value_rules(self, str_value: str) -> set:
+        """
+        获取值匹配的所有启用规则
+        
+        Args:
+            str_value: 字段值
+            
+        Returns:
+            正则匹配的规则名集合
+        """
+        if self._pattern_set is not None:
+            matched_ids = self._pattern_set.Match(str_value) or ()
+            return {self._pattern_owners[i] for i in matched_ids}
+        
+        return {
+            rule_name for rule_name, rule in self._compiled_rules.items()
+            if rule["enabled"] and (
+                rule["combined_pattern"].match(str_value) if rule["combined_pattern"] is not None
+                else any(pattern.match(str_value) for pattern in rule["patterns"])
+            )
+        }
+    
     def identify_sensitive_info(self, columns: List[str], record: Tuple) -> Dict[str, Any]:
         """
         识别敏感信息
@@ -137,16 +476,8 @@ class DatabaseAuditor:
         """
         sensitive_info = {}
         
-        # 加载敏感信息检测规则
-        rules_config = self.load_sensitive_rules()
-        rules = rules_config.get("sensitive_rules", {})
-        settings = rules_config.get("settings", {})
-        
-        enabled_rules = settings.get("enabled_rules", [])
-        case_sensitive = settings.get("case_sensitive", False)
-        max_field_length = settings.get("max_field_length", 100)
-        exclude_test_data = settings.get("exclude_test_data", True)
-        test_patterns = settings.get("test_patterns", [])
+        max_field_length = self._max_field_length
+        test_re = self._test_re
         
         if not record or len(record) != len(columns):
             return sensitive_info
@@ -154,58 +485,44 @@ class DatabaseAuditor:
         for i, column in enumerate(columns):
             value = record[i]
             
-            # 检查每种敏感信息类型
-            for rule_name, rule_config in rules.items():
-                if rule_name not in enabled_rules:
+            # 检查值匹配的规则（只有非None值才检查），每个值只扫描一次
+            value_rules = ()
+            display_value = None
+            if value is not None:
+                str_value = value if isinstance(value, str) else str(value)
+                
+                # 限制字段长度，超长的值不做去空白处理直接跳过
+                if len(str_value) > max_field_length:
                     continue
+                str_value = str_value.strip()
                 
-                field_keywords = rule_config.get("field_keywords", [])
-                regex_patterns = rule_config.get("regex_patterns", [])
+                # 排除测试数据
+                if test_re and test_re.search(str_value):
+                    continue
                 
-                # 检查字段名是否匹配关键词
-                is_field_match = False
-                column_check = column.lower() if not case_sensitive else column
-                for keyword in field_keywords:
-                    keyword_check = keyword.lower() if not case_sensitive else keyword
-                    if keyword_check in column_check:
-                        is_field_match = True
-                        break
+                # 日期时间和二进制值只参与字段名匹配
+                if not isinstance(value, NON_TEXT_TYPES):
+                    value_rules = self._match_value_rules(str_value)
                 
-                # 检查值是否匹配正则表达式（只有非None值才检查）
-                is_value_match = False
-                if value is not None:
-                    str_value = str(value).strip()
-                    
-                    # 排除测试数据
-                    if exclude_test_data and any(pattern.lower() in str_value.lower() for pattern in test_patterns):
-                        continue
-                    
-                    # 限制字段长度
-                    if len(str_value) > max_field_length:
-                        continue
-                        
-                    for pattern in regex_patterns:
-                        try:
-                            if re.match(pattern, str_value):
-                                is_value_match = True
-                                break
-                        except re.error as e:
-                            logger.warning(f"正则表达式错误 {pattern}: {str(e)}")
-                            continue
+                # 准备显示值
+                display_value = str_value if len(str_value) <= 50 else str_value[:50] + "..."
+            
+            # 检查字段名匹配关键词的规则，每个字段名只转换一次大小写
+            field_rules = self._match_field_rules(column)
+            
+            # 检查每种敏感信息类型
+            for rule_name, rule in self._compiled_rules.items():
+                if not rule["enabled"]:
+                    continue
+                
+                is_field_match = rule_name in field_rules
+                is_value_match = rule_name in value_rules
                 
                 # 如果字段名或值匹配，记录敏感信息
                 if is_field_match or is_value_match:
                     if rule_name not in sensitive_info:
                         sensitive_info[rule_name] = {}
                     
-                    # 准备显示值
-                    if value is not None:
-                        display_value = str(value).strip()
-                        if len(display_value) > 50:
-                            display_value = display_value[:50] + "..."
-                    else:
-                        display_value = None
-                    
                     sensitive_info[rule_name][column] = {
                         "value": display_value,
                         "field_match": is_field_match,
@@ -214,6 +531,71 @@ class DatabaseAuditor:
         
         return sensitive_info
     
+    def _field_only_detect(self, columns: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        只根据字段名识别敏感信息，用于没有数据的表
+        
+        Args:
+            columns: 字段名列表
+            
+        Returns:
+            与 identify_sensitive_info 格式相同的敏感信息字典，值均为None
+        """
+        sensitive_info = {}
+        for column in columns:
+            field_rules = self._match_field_rules(column)
+            if not field_rules:
+                continue
+            
+            # 按规则定义顺序输出，与 identify_sensitive_info 一致
+            for rule_name in self._compiled_rules:
+                if rule_name in field_rules:
+                    sensitive_info.setdefault(rule_name, {})[column] = {
+                        "value": None,
+                        "field_match": True,
+                        "value_match": False
+                    }
+        
+        return sensitive_info
+    
+    def _match_field_rules(self, column: str) -> set:
+        """
+        获取字段名匹配关键词的所有启用规则
+        
+        Args:
+            column: 字段名
+            
+        Returns:
+            字段名匹配的规则名集合
+        """
+        return self._keyword_matcher.match(column)
+    
+    def identify_sensitive_info_batch(self, columns: List[str], records: List[Tuple]) -> Dict[str, Any]:
+        """
+        识别多条记录中的敏感信息，逐条识别后合并结果
+        
+        某字段只要有一条记录的值匹配即视为值匹配，显示第一条匹配的值，否则显示第一条参与检测的值；
+        只有一条记录时结果与 identify_sensitive_info 一致。
+        
+        Args:
+            columns: 字段名列表
+            records: 数据记录列表
+            
+        Returns:
+            包含各类敏感信息的字典
+        """
+        sensitive_info = {}
+        
+        for record in records:
+            for rule_name, fields in self.identify_sensitive_info(columns, record).items():
+                merged_fields = sensitive_info.setdefault(rule_name, {})
+                for column, field_info in fields.items():
+                    merged = merged_fields.get(column)
+                    if merged is None or (field_info["value_match"] and not merged["value_match"]):
+                        merged_fields[column] = field_info
+        
+        return sensitive_info
+    
     def confirm_sensitive_data(self, sensitive_info: Dict[str, Any]) -> str:
         """
         确认敏感信息是否为真实数据
@@ -224,42 +606,14 @@ class DatabaseAuditor:
         Returns:
             "是" 表示确认为真实敏感数据，"否" 表示不确认
         """
-        if not sensitive_info:
-            return "否"
-        
-        # 加载敏感信息检测规则
-        rules_config = self.load_sensitive_rules()
-        rules = rules_config.get("sensitive_rules", {})
-        
-        # 检查每种敏感信息类型
-        for rule_name, detected_fields in sensitive_info.items():
-            if rule_name not in rules:
-                continue
-                
-            rule_config = rules[rule_name]
-            regex_patterns = rule_config.get("regex_patterns", [])
-            
-            # 检查该类型下的每个字段
-            for field_name, field_info in detected_fields.items():
-                if not isinstance(field_info, dict):
-                    continue
-                    
-                value = field_info.get("value")
-                if value is None:
-                    continue
-                
-                # 对值进行正则验证
-                str_value = str(value).strip()
-                for pattern in regex_patterns:
-                    try:
-                        if re.match(pattern, str_value):
-                            # 找到任何一个真实匹配的值就返回"是"
-                            return "是"
-                    except re.error:
-                        continue
-        
-        # 没有找到真实匹配的值
-        return "否"
+        # 识别时已经对原始值做过正则验证，直接使用记录的 value_match 结果，
+        # 找到任何一个真实匹配的值就返回"是"
+        confirmed = any(
+            field_info.get("value_match")
+            for detected_fields in sensitive_info.values() if isinstance(detected_fields, dict)
+            for field_info in detected_fields.values() if isinstance(field_info, dict)
+        )
+        return YES if confirmed else NO
     
     def parse_datasource_config(self, config_text: str) -> List[Dict[str, Any]]:
         """
@@ -272,29 +626,124 @@ class DatabaseAuditor:
             数据源配置列表
         """
         datasources = []
-        lines = config_text.strip().split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-                
-            parts = [part.strip() for part in line.split(',')]
-            if len(parts) >= 5:
-                datasource = {
-                    'datasource_name': parts[0],
-                    'ip': parts[1],
-                    'port': int(parts[2]),
-                    'username': parts[3],
-                    'password': parts[4]
-                }
+        for line in config_text.strip().split('\n'):
+            datasource = self._parse_datasource_line(line)
+            if datasource:
                 datasources.append(datasource)
-                logger.info(f"解析数据源配置: {datasource['datasource_name']} - {datasource['ip']}:{datasource['port']}")
-            else:
-                logger.warning(f"跳过无效的配置行: {line}")
         
         return datasources
     
+    def _parse_datasource_line(self, line: str) -> Optional[Dict[str, Any]]:
+        """
+        解析单行数据源配置
+        
+        Args:
+            line: 配置行，格式：datasource_name,ip,port,username,password
+            
+        Returns:
+            数据源配置，空行、注释行或无效行返回None
+        """
+        line = line.strip()
+        if not line or line.startswith('#'):
+            return None
+            
+        parts = [part.strip() for part in line.split(',')]
+        if len(parts) < 5:
+            logger.warning(f"跳过无效的配置行: {line}")
+            return None
+        
+        try:
+            port = int(parts[2])
+        except ValueError:
+            logger.warning(f"跳过端口无效的配置行: {line}")
+            return None
+        
+        datasource = {
+            'datasource_name': parts[0],
+            'ip': parts[1],
+            'port': port,
+            'username': parts[3],
+            'password': parts[4]
+        }
+        logger.info(f"解析数据源配置: {datasource['datasource_name']} - {datasource['ip']}:{datasource['port']}")
+        return datasource
+    
+    def _connect_kwargs(self, datasource: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        获取连接数据源使用的参数
+        
+        Args:
+            datasource: 数据源配置
+            
+        Returns:
+            数据库驱动 connect 参数
+        """
+        return {
+            'host': datasource['ip'],
+            'port': datasource['port'],
+            'user': datasource['username'],
+            'password': datasource['password'],
+            'charset': 'utf8mb4',
+            'connect_timeout': 10,
+            'read_timeout': 30,
+            'write_timeout': 30
+        }
+    
+    def _pool_key(self, datasource: Dict[str, Any]) -> Tuple:
+        """获取数据源对应连接池的键"""
+        return tuple(datasource.get(name) for name in ('ip', 'port', 'username', 'password'))
+    
+    def _get_pool(self, datasource: Dict[str, Any]):
+        """
+        获取数据源的连接池，首次使用时创建
+        
+        Args:
+            datasource: 数据源配置
+            
+        Returns:
+            PooledDB连接池
+        """
+        key = self._pool_key(datasource)
+        with self._pools_lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                # 最多缓存 max_workers 个空闲连接，与单个数据源的最大并发数一致
+                pool = PooledDB(self._driver, mincached=0, maxcached=self.max_workers,
+                                **self._connect_kwargs(datasource))
+                self._pools[key] = pool
+            return pool
+    
+    def _acquire_pool(self, datasource: Dict[str, Any]):
+        """
+        登记一次对数据源连接池的使用，与 _release_pool 成对调用
+        
+        Args:
+            datasource: 数据源配置
+        """
+        key = self._pool_key(datasource)
+        with self._pools_lock:
+            self._pool_users[key] = self._pool_users.get(key, 0) + 1
+    
+    def _release_pool(self, datasource: Dict[str, Any]):
+        """
+        结束一次对数据源连接池的使用，没有其他使用者时关闭连接池，释放其中缓存的连接
+        
+        Args:
+            datasource: 数据源配置
+        """
+        key = self._pool_key(datasource)
+        with self._pools_lock:
+            users = self._pool_users.pop(key, 0) - 1
+            if users > 0:
+                self._pool_users[key] = users
+                return
+            pool = self._pools.pop(key, None)
+        if pool is not None:
+            try:
+                pool.close()
+            except Exception as e:
+                logger.warning(f"关闭连接池失败 {datasource['datasource_name']}: {str(e)}")
+    
     def connect_database(self, datasource: Dict[str, Any]) -> Optional[pymysql.Connection]:
         """
         连接数据库
@@ -306,22 +755,33 @@ class DatabaseAuditor:
             数据库连接对象或None
         """
         try:
-            connection = pymysql.connect(
-                host=datasource['ip'],
-                port=datasource['port'],
-                user=datasource['username'],
-                password=datasource['password'],
-                charset='utf8mb4',
-                connect_timeout=10,
-                read_timeout=30,
-                write_timeout=30
-            )
+            if PooledDB is not None:
+                connection = self._get_pool(datasource).connection()
+            else:
+                connection = self._driver.connect(**self._connect_kwargs(datasource))
             logger.info(f"成功连接到数据库: {datasource['datasource_name']}")
             return connection
         except Exception as e:
             logger.error(f"连接数据库失败 {datasource['datasource_name']}: {str(e)}")
             return None
     
+    def _iter_rows(self, cursor, batch_size: int = FETCH_BATCH_SIZE):
+        """
+        分批读取查询结果
+        
+        Args:
+            cursor: 已执行查询的游标
+            batch_size: 每批读取的行数
+            
+        Yields:
+            结果行
+        """
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    
     def get_database_users(self, connection: pymysql.Connection) -> List[Dict[str, Any]]:
         """
         获取数据库用户信息
@@ -334,7 +794,8 @@ class DatabaseAuditor:
         """
         users = []
         try:
-            with connection.cursor() as cursor:
+            # 使用服务端游标流式读取，不在客户端缓存全部结果
+            with connection.cursor(self._driver.cursors.SSCursor) as cursor:
                 # 获取所有用户及其权限
                 cursor.execute("""
                     SELECT 
@@ -366,15 +827,9 @@ class DatabaseAuditor:
                 """)
                 
                 columns = [desc[0] for desc in cursor.description]
-                for row in cursor.fetchall():
-                    user_info = dict(zip(columns, row))
-                    # 转换Y/N为是/否
-                    for key, value in user_info.items():
-                        if value == 'Y':
-                            user_info[key] = '是'
-                        elif value == 'N':
-                            user_info[key] = '否'
-                    users.append(user_info)
+                for row in self._iter_rows(cursor):
+                    # 构建用户信息时同时转换Y/N为是/否
+                    users.append({column: YN_MAP.get(value, value) for column, value in zip(columns, row)})
                 
                 logger.info(f"获取到 {len(users)} 个数据库用户")
                 
@@ -395,9 +850,9 @@ class DatabaseAuditor:
         """
         databases = []
         try:
-            with connection.cursor() as cursor:
+            with connection.cursor(self._driver.cursors.SSCursor) as cursor:
                 cursor.execute("SHOW DATABASES")
-                for row in cursor.fetchall():
+                for row in self._iter_rows(cursor):
                     db_name = row[0]
                     # 跳过系统数据库
                     if db_name not in ['information_schema', 'performance_schema', 'mysql', 'sys']:
@@ -410,358 +865,865 @@ class DatabaseAuditor:
         
         return databases
     
-    def get_table_info(self, connection: pymysql.Connection, database: str) -> List[Dict[str, Any]]:
+    def _get_integer_primary_key(self, describe_rows: List[Tuple]) -> Optional[str]:
         """
-        获取数据库中所有表的信息
+        从字段信息中获取单列整数主键
         
         Args:
-            connection: 数据库连接
-            database: 数据库名称
+            describe_rows: DESCRIBE 格式的字段信息 (Field, Type, Null, Key, ...)
             
         Returns:
-            表信息列表
+            整数主键字段名，没有主键、联合主键或非整数主键时返回None
         """
-        table_info = []
-        try:
-            with connection.cursor() as cursor:
+        primary_keys = [row for row in describe_rows if len(row) > 3 and row[3] == 'PRI']
+        if len(primary_keys) != 1:
+            return None
+        
+        column_type = primary_keys[0][1]
+        if isinstance(column_type, bytes):
+            column_type = column_type.decode('utf-8', 'ignore')
+        base_type = column_type.lower().split('(')[0].split(' ')[0]
+        if base_type in ('tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint'):
+            return primary_keys[0][0]
+        return None
+    
+    def _sample_records(self, cursor, table: str, primary_key: Optional[str],
+                        total_count: int) -> List[Tuple]:
+        """
+        随机抽取表中的一批记录
+        
+        有整数主键时从随机主键位置开始按索引范围读取，避免大OFFSET逐行跳过；
+        否则使用随机OFFSET。
+        
+        Args:
+            cursor: 数据库游标
+            table: 表名
+            primary_key: 整数主键字段名
+            total_count: 表记录数（可以是估算值）
+            
+        Returns:
+            抽样记录列表
+        """
+        limit = self.sample_size
+        
+        if primary_key:
+            # 随机起点放在派生表中，只计算一次
+            cursor.execute(
+                f"SELECT t.* FROM `{table}` AS t "
+                f"JOIN (SELECT MIN(`{primary_key}`) + FLOOR(RAND() * (MAX(`{primary_key}`) - MIN(`{primary_key}`) + 1)) AS start_id "
+                f"FROM `{table}`) AS r "
+                f"WHERE t.`{primary_key}` >= r.start_id ORDER BY t.`{primary_key}` LIMIT {limit}"
+            )
+            return list(cursor.fetchall())
+        
+        random_offset = random.randint(0, max(0, total_count - limit))
+        cursor.execute(f"SELECT * FROM `{table}` LIMIT {limit} OFFSET {random_offset}")
+        records = list(cursor.fetchall())
+        if not records and random_offset > 0:
+            # 估算的记录数偏大时从头读取
+            cursor.execute(f"SELECT * FROM `{table}` LIMIT {limit}")
+            records = list(cursor.fetchall())
+        return records
+    
+    def _get_table_columns(self, cursor, database: str) -> Dict[str, List[Tuple]]:
+        """
+        一次查询获取数据库中所有表的字段信息
+        
+        Args:
+            cursor: 数据库游标
+            database: 数据库名称
+            
+        Returns:
+            表名 -> 按字段顺序排列的 (Field, Type, Null, Key)，与 DESCRIBE 结果的前四列一致
+        """
+        cursor.execute(
+            "SELECT table_name, column_name, column_type, is_nullable, column_key "
+            "FROM information_schema.columns WHERE table_schema = %s "
+            "ORDER BY table_name, ordinal_position",
+            (database,)
+        )
+        return {
+            table: [row[1:] for row in rows]
+            for table, rows in itertools.groupby(cursor.fetchall(), key=operator.itemgetter(0))
+        }
+    
+    def _get_exact_counts(self, cursor, tables: List[str]) -> Optional[Dict[str, int]]:
+        """
+        使用 UNION ALL 合并各表的 COUNT(*)，每批表只需一次查询
+        
+        Args:
+            cursor: 已切换到目标数据库的游标
+            tables: 表名列表
+            
+        Returns:
+            表名 -> 精确记录数，查询失败时返回None，由各表单独执行COUNT(*)
+        """
+        table_counts = {}
+        try:
+            for start in range(0, len(tables), COUNT_BATCH_SIZE):
+                batch = tables[start:start + COUNT_BATCH_SIZE]
+                cursor.execute(" UNION ALL ".join(
+                    f"SELECT %s, COUNT(*) FROM `{table}`" for table in batch
+                ), batch)
+                table_counts.update((row[0], int(row[1])) for row in cursor.fetchall())
+        except Exception as e:
+            logger.warning(f"批量获取表记录数失败，改为逐表统计: {str(e)}")
+            return None
+        return table_counts
+    
+    def get_table_info(self, connection: pymysql.Connection, database: str,
+                       connection_factory: Optional[Callable[[], Any]] = None,
+                       max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        获取数据库中所有表的信息
+        
+        提供 connection_factory 时使用线程池并发处理各表，每个工作线程使用自己的数据库连接；
+        否则在传入的连接上顺序处理。
+        
+        Args:
+            connection: 数据库连接
+            database: 数据库名称
+            connection_factory: 创建新数据库连接的函数
+            max_workers: 最大并发线程数，默认使用 self.max_workers
+            
+        Returns:
+            表信息列表
+        """
+        table_info = []
+        try:
+            with connection.cursor() as cursor:
                 # 切换到指定数据库
                 cursor.execute(f"USE `{database}`")
                 
-                # 获取所有表名
-                cursor.execute("SHOW TABLES")
-                tables = [row[0] for row in cursor.fetchall()]
+                # 一次查询获取所有表名和估算记录数，避免逐表COUNT(*)全表扫描
+                cursor.execute(
+                    "SELECT table_name, table_rows FROM information_schema.tables "
+                    "WHERE table_schema = %s ORDER BY table_name",
+                    (database,)
+                )
+                table_rows = cursor.fetchall()
+                tables = [row[0] for row in table_rows]
                 
                 logger.info(f"数据库 {database} 中有 {len(tables)} 个表")
                 
-                for table in tables:
-                    try:
-                        # 获取表字段信息
-                        cursor.execute(f"DESCRIBE `{table}`")
-                        columns = [row[0] for row in cursor.fetchall()]
-                        
-                        # 获取表记录总数
-                        cursor.execute(f"SELECT COUNT(*) FROM `{table}`")
-                        total_count = cursor.fetchone()[0]
-                        
-                        # 获取随机一条记录并转换为JSON格式（如果表不为空）
-                        column_value_json = "{}"
-                        phone_numbers_json = "{}"
+                if self.approximate_counts:
+                    table_counts = {row[0]: int(row[1] or 0) for row in table_rows}
+                else:
+                    table_counts = self._get_exact_counts(cursor, tables)
+                
+                # 一次查询获取所有表的字段信息，代替逐表DESCRIBE
+                table_columns = self._get_table_columns(cursor, database)
+                
+                workers = min(max_workers or self.max_workers, len(tables))
+                if connection_factory is None or workers <= 1:
+                    for table in tables:
+                        table_info.append(self._process_one_table(cursor, database, table, table_counts,
+                                                                  table_columns))
+                    return table_info
+            
+            table_info = self._process_tables_concurrently(database, tables, connection_factory, workers,
+                                                           table_counts, table_columns)
+                
+        except Exception as e:
+            logger.error(f"获取数据库 {database} 表信息失败: {str(e)}")
+        
+        return table_info
+    
+    def _process_tables_concurrently(self, database: str, tables: List[str],
+                                     connection_factory: Callable[[], Any], workers: int,
+                                     table_counts: Optional[Dict[str, int]] = None,
+                                     table_columns: Optional[Dict[str, List[Tuple]]] = None) -> List[Dict[str, Any]]:
+        """
+        使用线程池并发处理各表，连接保存在线程本地存储中，每个线程只建立一次
+        
+        Args:
+            database: 数据库名称
+            tables: 表名列表
+            connection_factory: 创建新数据库连接的函数
+            workers: 线程数
+            table_counts: 表名 -> 估算记录数，None时逐表执行COUNT(*)
+            table_columns: 表名 -> 字段信息，None时逐表执行DESCRIBE
+            
+        Returns:
+            表信息列表，顺序与 tables 一致
+        """
+        local = threading.local()
+        connections = []
+        connections_lock = threading.Lock()
+        
+        def process(table: str) -> Dict[str, Any]:
+            connection = getattr(local, 'connection', None)
+            if connection is None:
+                connection = connection_factory()
+                if connection is None:
+                    return self._table_error_record(table, "连接数据库失败")
+                with connections_lock:
+                    connections.append(connection)
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"USE `{database}`")
+                except Exception as e:
+                    # 不缓存切换数据库失败的连接，下一张表重新建立连接
+                    logger.error(f"处理表 {table} 失败: {str(e)}")
+                    return self._table_error_record(table, str(e))
+                local.connection = connection
+            
+            with connection.cursor() as cursor:
+                return self._process_one_table(cursor, database, table, table_counts, table_columns)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(process, tables))
+        finally:
+            for connection in connections:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+    
+    def _process_one_table(self, cursor, database: str, table: str,
+                           table_counts: Optional[Dict[str, int]] = None,
+                           table_columns: Optional[Dict[str, List[Tuple]]] = None) -> Dict[str, Any]:
+        """
+        获取单张表的信息
+        
+        Args:
+            cursor: 已切换到目标数据库的游标
+            database: 数据库名称
+            table: 表名
+            table_counts: 表名 -> 估算记录数，None时执行COUNT(*)获取精确记录数
+            table_columns: 表名 -> 字段信息，表不在其中时执行DESCRIBE获取
+            
+        Returns:
+            表信息
+        """
+        try:
+            # 获取表字段信息
+            describe_rows = table_columns.get(table) if table_columns is not None else None
+            if describe_rows is None:
+                cursor.execute(f"DESCRIBE `{table}`")
+                describe_rows = cursor.fetchall()
+            columns = [row[0] for row in describe_rows]
+            primary_key = self._get_integer_primary_key(describe_rows)
+            
+            # 获取表记录总数
+            if table_counts is not None:
+                total_count = table_counts.get(table, 0)
+            else:
+                cursor.execute(f"SELECT COUNT(*) FROM `{table}`")
+                total_count = cursor.fetchone()[0]
+            
+            # 随机抽取一批记录并转换为JSON格式
+            column_value_json = "{}"
+            sensitive_info_json = "{}"
+            sensitive_info = None
+            sensitive_confirmed = NO
+            records = []
+            sample_failed = False
+            
+            if columns:
+                try:
+                    records = self._sample_records(cursor, table, primary_key, total_count)
+                except Exception as e:
+                    logger.warning(f"获取表 {table} 随机记录失败: {str(e)}")
+                    sample_failed = True
+            
+            if sample_failed:
+                column_value_json = SAMPLE_ERROR_JSON
+                sensitive_info_json = SAMPLE_ERROR_JSON
+            elif records:
+                # 估算的记录数可能滞后，至少为实际抽到的记录数
+                total_count = max(total_count, len(records))
+                try:
+                    record = records[0]
+                    if record:
+                        # 创建字段名和值的字典
+                        column_value_dict = {}
+                        for i, column in enumerate(columns):
+                            if i < len(record):
+                                value = record[i]
+                                # 处理不同数据类型
+                                if value is None:
+                                    column_value_dict[column] = None
+                                elif isinstance(value, (int, float, bool)):
+                                    column_value_dict[column] = value
+                                else:
+                                    # 转换为字符串，限制长度
+                                    str_value = str(value)
+                                    if len(str_value) > 100:
+                                        str_value = str_value[:100] + "..."
+                                    column_value_dict[column] = str_value
                         
-                        if total_count > 0 and columns:
-                            try:
-                                # 使用LIMIT和OFFSET获取随机记录
-                                random_offset = random.randint(0, max(0, total_count - 1))
-                                cursor.execute(f"SELECT * FROM `{table}` LIMIT 1 OFFSET {random_offset}")
-                                record = cursor.fetchone()
-                                if record:
-                                    # 创建字段名和值的字典
-                                    column_value_dict = {}
-                                    for i, column in enumerate(columns):
-                                        if i < len(record):
-                                            value = record[i]
-                                            # 处理不同数据类型
-                                            if value is None:
-                                                column_value_dict[column] = None
-                                            elif isinstance(value, (int, float, bool)):
-                                                column_value_dict[column] = value
-                                            else:
-                                                # 转换为字符串，限制长度
-                                                str_value = str(value)
-                                                if len(str_value) > 100:
-                                                    str_value = str_value[:100] + "..."
-                                                column_value_dict[column] = str_value
-                                    
-                                    # 转换为JSON字符串
-                                    column_value_json = json.dumps(column_value_dict, ensure_ascii=False, separators=(',', ':'))
-                                    
-                                    # 识别敏感信息
-                                    sensitive_info = self.identify_sensitive_info(columns, record)
-                                    sensitive_info_json = json.dumps(sensitive_info, ensure_ascii=False, separators=(',', ':'))
-                                    
-                                    # 确认敏感信息
-                                    sensitive_confirmed = self.confirm_sensitive_data(sensitive_info)
-                                    
-                            except Exception as e:
-                                logger.warning(f"获取表 {table} 随机记录失败: {str(e)}")
-                                column_value_json = '{"error": "获取失败"}'
-                                sensitive_info_json = '{"error": "获取失败"}'
-                                sensitive_confirmed = "否"
-                        elif columns:
-                            # 表为空但有字段，显示字段结构
-                            empty_dict = {column: None for column in columns}
-                            column_value_json = json.dumps(empty_dict, ensure_ascii=False, separators=(',', ':'))
-                            
-                            # 对空表也检查字段名是否包含敏感信息关键词
-                            empty_record = tuple([None] * len(columns))
-                            sensitive_info = self.identify_sensitive_info(columns, empty_record)
-                            sensitive_info_json = json.dumps(sensitive_info, ensure_ascii=False, separators=(',', ':'))
-                            sensitive_confirmed = self.confirm_sensitive_data(sensitive_info)
+                        # 转换为JSON字符串
+                        column_value_json = _json_dumps(column_value_dict)
                         
-                        # 每张表创建一条记录
-                        table_info.append({
-                            '表名': table,
-                            '字段名和值': column_value_json,
-                            '敏感信息': sensitive_info_json,
-                            '敏感信息确认': sensitive_confirmed,
-                            '总条数': total_count
-                        })
+                        # 识别敏感信息
+                        sensitive_info = self.identify_sensitive_info_batch(columns, records)
+                        sensitive_info_json = _json_dumps(sensitive_info)
                         
-                        logger.debug(f"处理表 {table}: {len(columns)} 个字段, {total_count} 条记录")
+                        # 确认敏感信息
+                        sensitive_confirmed = self.confirm_sensitive_data(sensitive_info)
                         
-                    except Exception as e:
-                        logger.error(f"处理表 {table} 失败: {str(e)}")
-                        # 添加错误记录
-                        table_info.append({
-                            '表名': table,
-                            '字段名和值': f'{{"error": "{str(e)}"}}',
-                            '敏感信息': '{"error": "获取失败"}',
-                            '敏感信息确认': "否",
-                            '总条数': 0
-                        })
+                except Exception as e:
+                    logger.warning(f"获取表 {table} 随机记录失败: {str(e)}")
+                    column_value_json = SAMPLE_ERROR_JSON
+                    sensitive_info_json = SAMPLE_ERROR_JSON
+                    sensitive_info = None
+                    sensitive_confirmed = NO
+            elif columns:
+                # 表为空但有字段，显示字段结构
+                empty_dict = {column: None for column in columns}
+                column_value_json = _json_dumps(empty_dict)
                 
+                # 对空表只检查字段名是否包含敏感信息关键词
+                sensitive_info = self._field_only_detect(columns)
+                sensitive_info_json = _json_dumps(sensitive_info)
+                sensitive_confirmed = self.confirm_sensitive_data(sensitive_info)
+            
+            logger.debug(f"处理表 {table}: {len(columns)} 个字段, {total_count} 条记录")
+            
+            # 每张表创建一条记录
+            return {
+                '表名': table,
+                '字段名和值': column_value_json,
+                '敏感信息': sensitive_info_json,
+                '敏感信息确认': sensitive_confirmed,
+                '总条数': total_count,
+                # 敏感信息的原始字典，汇总审计结果时直接使用，不写入报告
+                SENSITIVE_INFO_DICT_KEY: sensitive_info
+            }
+            
         except Exception as e:
-            logger.error(f"获取数据库 {database} 表信息失败: {str(e)}")
+            logger.error(f"处理表 {table} 失败: {str(e)}")
+            return self._table_error_record(table, str(e))
+    
+    def _table_error_record(self, table: str, message: str) -> Dict[str, Any]:
+        """
+        生成处理失败的表记录
         
-        return table_info
+        Args:
+            table: 表名
+            message: 错误信息
+            
+        Returns:
+            表信息
+        """
+        return {
+            '表名': table,
+            '字段名和值': _json_dumps({"error": message}),
+            '敏感信息': SAMPLE_ERROR_JSON,
+            '敏感信息确认': NO,
+            '总条数': 0
+        }
     
-    def _apply_conditional_formatting(self, worksheet, dataframe, sheet_type='database'):
+    def _create_report_formats(self, workbook) -> Dict[str, Any]:
         """
-        应用条件格式化到Excel工作表
+        在workbook中注册报告使用的格式，同一报告的所有sheet共用
         
         Args:
-            worksheet: openpyxl工作表对象
-            dataframe: pandas数据框
-            sheet_type: sheet类型，'database' 或 'users'
+            workbook: xlsxwriter工作簿对象
+            
+        Returns:
+            格式名 -> xlsxwriter格式对象
         """
-        try:
-            from openpyxl.styles import Font, PatternFill
+        return {name: workbook.add_format(props) for name, props in REPORT_FORMATS.items()}
+    
+    @staticmethod
+    def _column_positions(columns: List[str]) -> Dict[str, int]:
+        """
+        获取列名到列位置（从0开始）的映射，每个sheet只构建一次
+        
+        Args:
+            columns: 列名列表
             
-            # 创建红色加粗字体样式
-            red_bold_font = Font(color="FF0000", bold=True)
+        Returns:
+            列名 -> 列位置
+        """
+        return {column: idx for idx, column in enumerate(columns)}
+    
+    def _apply_conditional_formatting(self, worksheet, columns: List[str], row_count: int,
+                                      sheet_type='database', formats=None):
+        """
+        应用条件格式化到Excel工作表，由Excel按规则渲染，不逐个单元格设置样式
+        
+        Args:
+            worksheet: xlsxwriter工作表对象
+            columns: 列名列表
+            row_count: 数据行数（不含标题行）
+            sheet_type: sheet类型，'database'、'users' 或 'audit'
+            formats: _create_report_formats 返回的格式字典
+        """
+        try:
+            last_row = row_count  # 标题行为第0行，数据从第1行开始
+            last_col = len(columns) - 1
+            if last_row < 1 or last_col < 0:
+                return
+            positions = self._column_positions(columns)
             
             if sheet_type == 'database':
                 # 数据库sheet：只格式化"敏感信息确认"列
-                sensitive_confirm_col = None
-                for idx, col_name in enumerate(dataframe.columns):
-                    if col_name == '敏感信息确认':
-                        sensitive_confirm_col = idx + 1  # Excel列从1开始
-                        break
-                
+                sensitive_confirm_col = positions.get('敏感信息确认')
                 if sensitive_confirm_col is not None:
-                    # 遍历数据行（跳过标题行）
-                    for row_idx in range(2, len(dataframe) + 2):  # Excel行从1开始，数据从第2行开始
-                        cell = worksheet.cell(row=row_idx, column=sensitive_confirm_col)
-                        if cell.value == '是':
-                            cell.font = red_bold_font
+                    worksheet.conditional_format(1, sensitive_confirm_col, last_row, sensitive_confirm_col, {
+                        'type': 'cell', 'criteria': '==', 'value': f'"{YES}"', 'format': formats['red_bold']
+                    })
             
             elif sheet_type == 'users':
                 # users sheet：格式化所有包含"是"值的单元格
-                for row_idx in range(2, len(dataframe) + 2):  # 跳过标题行
-                    for col_idx in range(1, len(dataframe.columns) + 1):
-                        cell = worksheet.cell(row=row_idx, column=col_idx)
-                        if cell.value == '是':
-                            cell.font = red_bold_font
+                worksheet.conditional_format(1, 0, last_row, last_col, {
+                    'type': 'cell', 'criteria': '==', 'value': f'"{YES}"', 'format': formats['red_bold']
+                })
             
             elif sheet_type == 'audit':
                 # 审计结果sheet：根据风险等级着色
-                from openpyxl.styles import PatternFill
-                
-                # 创建不同风险等级的样式
-                high_risk_fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")  # 浅红色背景
-                medium_risk_fill = PatternFill(start_color="FFFFCC", end_color="FFFFCC", fill_type="solid")  # 浅黄色背景
-                high_risk_font = Font(color="CC0000", bold=True)  # 深红色字体
-                medium_risk_font = Font(color="FF6600", bold=True)  # 橙色字体
-                
-                # 找到风险等级列
-                risk_level_col = None
-                for idx, col_name in enumerate(dataframe.columns):
-                    if col_name == '风险等级':
-                        risk_level_col = idx + 1
-                        break
-                
+                risk_level_col = positions.get('风险等级')
                 if risk_level_col is not None:
-                    # 遍历数据行并应用格式
-                    for row_idx in range(2, len(dataframe) + 2):
-                        risk_cell = worksheet.cell(row=row_idx, column=risk_level_col)
-                        
-                        if risk_cell.value == '高':
-                            # 高风险：整行浅红色背景，风险等级列深红色字体
-                            for col_idx in range(1, len(dataframe.columns) + 1):
-                                cell = worksheet.cell(row=row_idx, column=col_idx)
-                                cell.fill = high_risk_fill
-                            risk_cell.font = high_risk_font
-                            
-                        elif risk_cell.value == '中':
-                            # 中风险：整行浅黄色背景，风险等级列橙色字体
-                            for col_idx in range(1, len(dataframe.columns) + 1):
-                                cell = worksheet.cell(row=row_idx, column=col_idx)
-                                cell.fill = medium_risk_fill
-                            risk_cell.font = medium_risk_font
+                    from xlsxwriter.utility import xl_rowcol_to_cell
+                    
+                    # 规则以第一个数据行为基准，列使用绝对引用，整行按本行的风险等级着色
+                    risk_cell = xl_rowcol_to_cell(1, risk_level_col, col_abs=True)
+                    for level, name in (('高', 'high'), ('中', 'medium')):
+                        # 风险等级列：高风险深红色字体，中风险橙色字体
+                        worksheet.conditional_format(1, risk_level_col, last_row, risk_level_col, {
+                            'type': 'cell', 'criteria': '==', 'value': f'"{level}"',
+                            'format': formats[f'{name}_risk_level']
+                        })
+                        # 整行：高风险浅红色背景，中风险浅黄色背景
+                        worksheet.conditional_format(1, 0, last_row, last_col, {
+                            'type': 'formula', 'criteria': f'={risk_cell}="{level}"',
+                            'format': formats[f'{name}_risk_row']
+                        })
                     
         except ImportError:
-            logger.warning("openpyxl样式模块导入失败，跳过条件格式化")
+            logger.warning("xlsxwriter工具模块导入失败，跳过条件格式化")
         except Exception as e:
             logger.warning(f"应用条件格式化失败: {str(e)}")
     
-    def _add_hyperlinks_to_audit_sheet(self, worksheet, dataframe):
+    def _apply_openpyxl_conditional_formatting(self, worksheet, columns: List[str], row_count: int,
+                                               sheet_type='database'):
         """
-        为审计结果sheet的检查项列添加超链接
+        未安装xlsxwriter时使用openpyxl的条件格式规则，格式与 _apply_conditional_formatting 相同
         
         Args:
             worksheet: openpyxl工作表对象
-            dataframe: pandas数据框
+            columns: 列名列表
+            row_count: 数据行数（不含标题行）
+            sheet_type: sheet类型，'database'、'users' 或 'audit'
         """
         try:
-            from openpyxl.styles import Font
+            from openpyxl.formatting.rule import CellIsRule, FormulaRule
+            from openpyxl.utils import get_column_letter
             
-            # 找到检查项列
-            check_item_col = None
-            for idx, col_name in enumerate(dataframe.columns):
-                if col_name == '检查项':
-                    check_item_col = idx + 1  # Excel列从1开始
-                    break
-            
-            if check_item_col is None:
+            if row_count < 1 or not columns:
                 return
+            styles = _excel_styles()
+            positions = self._column_positions(columns)
+            last_row = row_count + 1  # 标题行为第1行
             
-            # 创建超链接字体样式
-            link_font = Font(color="0000FF", underline="single")
+            def column_range(first_col, last_col=None):
+                last_col = first_col if last_col is None else last_col
+                return f"{get_column_letter(first_col + 1)}2:{get_column_letter(last_col + 1)}{last_row}"
             
-            # 遍历数据行并添加超链接
-            for row_idx in range(2, len(dataframe) + 2):  # 跳过标题行
-                cell = worksheet.cell(row=row_idx, column=check_item_col)
-                check_item_value = cell.value
-                
-                if check_item_value and check_item_value != '用户权限':
-                    # 对数据库名称添加超链接到对应sheet
-                    # Excel sheet名称长度限制为31字符
-                    sheet_name = check_item_value[:31] if len(check_item_value) > 31 else check_item_value
-                    # 尝试使用标准的Excel内部链接格式
-                    from openpyxl.worksheet.hyperlink import Hyperlink
-                    cell.hyperlink = Hyperlink(ref=cell.coordinate, location=f"'{sheet_name}'!A1")
-                    cell.font = link_font
-                elif check_item_value == '用户权限':
-                    # 对用户权限添加超链接到用户权限sheet
-                    from openpyxl.worksheet.hyperlink import Hyperlink
-                    cell.hyperlink = Hyperlink(ref=cell.coordinate, location="'用户权限'!A1")
-                    cell.font = link_font
+            def equals(value, **style):
+                return CellIsRule(operator='equal', formula=[f'"{value}"'], **style)
+            
+            if sheet_type == 'database':
+                # 数据库sheet：只格式化"敏感信息确认"列
+                sensitive_confirm_col = positions.get('敏感信息确认')
+                if sensitive_confirm_col is not None:
+                    worksheet.conditional_formatting.add(
+                        column_range(sensitive_confirm_col), equals(YES, font=styles['red_bold_font'])
+                    )
+            
+            elif sheet_type == 'users':
+                # users sheet：格式化所有包含"是"值的单元格
+                worksheet.conditional_formatting.add(
+                    column_range(0, len(columns) - 1), equals(YES, font=styles['red_bold_font'])
+                )
+            
+            elif sheet_type == 'audit':
+                # 审计结果sheet：根据风险等级着色
+                risk_level_col = positions.get('风险等级')
+                if risk_level_col is not None:
+                    risk_cell = f"${get_column_letter(risk_level_col + 1)}2"
+                    for level, name in (('高', 'high'), ('中', 'medium')):
+                        # 风险等级列：高风险深红色字体，中风险橙色字体
+                        worksheet.conditional_formatting.add(
+                            column_range(risk_level_col), equals(level, font=styles[f'{name}_risk_font'])
+                        )
+                        # 整行：高风险浅红色背景，中风险浅黄色背景
+                        worksheet.conditional_formatting.add(
+                            column_range(0, len(columns) - 1),
+                            FormulaRule(formula=[f'{risk_cell}="{level}"'], fill=styles[f'{name}_risk_fill'])
+                        )
                     
         except ImportError:
-            logger.warning("openpyxl样式模块导入失败，跳过超链接添加")
+            logger.warning("openpyxl样式模块导入失败，跳过条件格式化")
         except Exception as e:
-            logger.warning(f"添加超链接失败: {str(e)}")
+            logger.warning(f"应用条件格式化失败: {str(e)}")
     
-    def _generate_audit_summary(self, users: List[Dict[str, Any]], 
-                               databases_info: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    def _audit_summary_frame(self, users: List[Dict[str, Any]],
+                             databases_info: Dict[str, List[Dict[str, Any]]]):
         """
-        生成审计结果汇总
+        生成排好序的审计结果数据框，列固定为 AUDIT_COLUMNS
         
         Args:
             users: 用户信息列表
             databases_info: 数据库信息字典
             
         Returns:
-            审计结果列表
+            审计结果数据框
         """
-        audit_results = []
-        
         # 1. 敏感信息风险汇总 - 每张表一条记录
-        for database, table_info in databases_info.items():
-            for table in table_info:
-                if table.get('敏感信息确认') == '是':
-                    # 解析敏感信息详情
-                    sensitive_info = {}
-                    try:
-                        import json
-                        sensitive_info = json.loads(table.get('敏感信息', '{}'))
-                    except:
-                        pass
-                    
-                    if sensitive_info:
-                        # 汇总该表的所有敏感信息类型
-                        sensitive_types = list(sensitive_info.keys())
-                        sensitive_fields = []
-                        sample_values = []
-                        
-                        for sensitive_type, fields in sensitive_info.items():
-                            for field_name, details in fields.items():
-                                sensitive_fields.append(f"{field_name}({sensitive_type})")
-                                if details.get('value'):
-                                    value = str(details.get('value', ''))
-                                    sample_values.append(value[:10] + '...' if len(value) > 10 else value)
-                        
-                        # 生成汇总描述
-                        types_str = '、'.join(sensitive_types)
-                        fields_str = '、'.join(sensitive_fields[:3])  # 最多显示3个字段
-                        if len(sensitive_fields) > 3:
-                            fields_str += f'等{len(sensitive_fields)}个字段'
-                        
-                        audit_results.append({
-                            '风险类型': '敏感信息',
-                            '风险等级': '高',
-                            '检查项': database,
-                            '表名': table.get('表名', ''),
-                            '字段名': fields_str,
-                            '敏感类型': types_str,
-                            '风险描述': f'表 {table.get("表名", "")} 包含敏感信息: {types_str}',
-                            '检测值': '、'.join(sample_values[:2]) + ('...' if len(sample_values) > 2 else ''),
-                            '记录总数': table.get('总条数', 0),
-                            '建议': f'对包含{types_str}的字段进行加密或脱敏处理'
-                        })
-        
         # 2. 高危权限风险汇总
-        high_risk_permissions = [
-            '超级权限', '文件权限', '关闭权限', '重载权限', 
-            '进程权限', '授权权限', '复制从权限', '复制客户端权限'
+        frames = [self._sensitive_risk_frame(databases_info), self._permission_risk_frame(users)]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=AUDIT_COLUMNS)
+        audit_df = pd.concat(frames, ignore_index=True)
+        
+        # 3. 按风险等级排序，同等级同类型的记录保持原有顺序
+        risk_priority = {'高': 1, '中': 2, '低': 3}
+        priority = audit_df['风险等级'].map(risk_priority).fillna(99)
+        order = pd.DataFrame({'priority': priority, 'type': audit_df['风险类型']}).sort_values(
+            ['priority', 'type'], kind='stable'
+        ).index
+        audit_df = audit_df.loc[order, AUDIT_COLUMNS]
+        
+        # 取值很少的列转为分类类型，每种取值只保存一份
+        return audit_df.astype({'风险类型': 'category', '风险等级': 'category', '检查项': 'category',
+                                '敏感类型': 'category'})
+    
+    def _sensitive_risk_frame(self, databases_info: Dict[str, List[Dict[str, Any]]]):
+        """
+        汇总确认包含敏感信息的表，每张表一条风险记录
+        
+        Args:
+            databases_info: 数据库信息字典
+            
+        Returns:
+            风险记录数据框
+        """
+        tables = [table for table_info in databases_info.values() for table in table_info]
+        tables_df = pd.DataFrame(tables, columns=['表名', '敏感信息', '敏感信息确认', '总条数', SENSITIVE_INFO_DICT_KEY])
+        if tables_df.empty:
+            return pd.DataFrame(columns=AUDIT_COLUMNS)
+        tables_df['检查项'] = [database for database, table_info in databases_info.items() for _ in table_info]
+        
+        confirmed = tables_df[tables_df['敏感信息确认'] == YES]
+        # 优先使用扫描时保留的字典，没有时解析JSON
+        sensitive_infos = confirmed[SENSITIVE_INFO_DICT_KEY]
+        sensitive_infos = sensitive_infos.where(sensitive_infos.notna(), confirmed['敏感信息'])
+        summaries = sensitive_infos.map(self._summarize_sensitive_info).dropna()
+        if summaries.empty:
+            return pd.DataFrame(columns=AUDIT_COLUMNS)
+        
+        confirmed = confirmed.loc[summaries.index]
+        details = pd.DataFrame(summaries.tolist(), index=summaries.index)
+        table_names = confirmed['表名'].fillna('')
+        types_str = details['敏感类型']
+        
+        return pd.DataFrame({
+            '风险类型': '敏感信息',
+            '风险等级': '高',
+            '检查项': confirmed['检查项'],
+            '表名': table_names,
+            '字段名': details['字段名'],
+            '敏感类型': types_str,
+            '风险描述': '表 ' + table_names.astype(str) + ' 包含敏感信息: ' + types_str,
+            '检测值': details['检测值'],
+            '记录总数': confirmed['总条数'].astype(object).where(confirmed['总条数'].notna(), 0),
+            '建议': '对包含' + types_str + '的字段进行加密或脱敏处理'
+        }, columns=AUDIT_COLUMNS)
+    
+    def _summarize_sensitive_info(self, sensitive_info: Any) -> Optional[Dict[str, str]]:
+        """
+        把单张表的敏感信息汇总为风险记录中的描述字段
+        
+        Args:
+            sensitive_info: 敏感信息字典，或表记录中的敏感信息JSON字符串
+            
+        Returns:
+            字段名、敏感类型、检测值描述，没有可用的敏感信息时返回None
+        """
+        if not isinstance(sensitive_info, dict):
+            try:
+                sensitive_info = _json_loads(sensitive_info)
+            except (TypeError, ValueError):
+                return None
+        if not sensitive_info or not isinstance(sensitive_info, dict):
+            return None
+        
+        # 汇总该表的所有敏感信息类型
+        sensitive_fields = [
+            f"{field_name}({sensitive_type})"
+            for sensitive_type, fields in sensitive_info.items()
+            for field_name in fields
+        ]
+        sample_values = [
+            str(details['value'])
+            for fields in sensitive_info.values()
+            for details in fields.values()
+            if details.get('value')
         ]
         
-        for user in users:
-            username = user.get('用户名', '')
-            host = user.get('主机', '')
-            
-            # 检查高危权限
-            user_high_risks = []
-            for perm in high_risk_permissions:
-                if user.get(perm) == '是':
-                    user_high_risks.append(perm)
-            
-            if user_high_risks:
-                audit_results.append({
-                    '风险类型': '权限风险',
-                    '风险等级': '高' if '超级权限' in user_high_risks else '中',
-                    '检查项': '用户权限',
-                    '表名': '-',
-                    '字段名': '-',
-                    '敏感类型': '数据库权限',
-                    '风险描述': f'用户 {username}@{host} 拥有高危权限: {", ".join(user_high_risks)}',
-                    '检测值': f'{len(user_high_risks)}个高危权限',
-                    '记录总数': '-',
-                    '建议': '根据最小权限原则，移除不必要的高危权限'
-                })
+        fields_str = '、'.join(sensitive_fields[:3])  # 最多显示3个字段
+        if len(sensitive_fields) > 3:
+            fields_str += f'等{len(sensitive_fields)}个字段'
+        
+        return {
+            '字段名': fields_str,
+            '敏感类型': '、'.join(sensitive_info.keys()),
+            '检测值': '、'.join(value[:10] + '...' if len(value) > 10 else value for value in sample_values[:2])
+                      + ('...' if len(sample_values) > 2 else '')
+        }
+    
+    def _permission_risk_frame(self, users: List[Dict[str, Any]]):
+        """
+        汇总用户的高危权限和通配符主机风险
+        
+        Args:
+            users: 用户信息列表
             
-            # 检查通配符主机权限
-            if host == '%' and any(user.get(perm) == '是' for perm in ['查询权限', '插入权限', '更新权限', '删除权限']):
-                audit_results.append({
-                    '风险类型': '权限风险',
-                    '风险等级': '中',
-                    '检查项': '用户权限',
-                    '表名': '-',
-                    '字段名': '-',
-                    '敏感类型': '主机权限',
-                    '风险描述': f'用户 {username} 允许从任意主机(%)连接并具有数据操作权限',
-                    '检测值': '通配符主机权限',
-                    '记录总数': '-',
-                    '建议': '限制用户只能从特定主机连接，避免使用通配符(%)'
-                })
+        Returns:
+            风险记录数据框，同一用户的两类风险相邻
+        """
+        users_df = pd.DataFrame(users)
+        if users_df.empty:
+            return pd.DataFrame(columns=AUDIT_COLUMNS)
         
-        # 3. 按风险等级排序
-        risk_priority = {'高': 1, '中': 2, '低': 3}
-        audit_results.sort(key=lambda x: (risk_priority.get(x['风险等级'], 99), x['风险类型']))
+        usernames = users_df.get('用户名', pd.Series('', index=users_df.index)).fillna('').astype(str)
+        hosts = users_df.get('主机', pd.Series('', index=users_df.index)).fillna('').astype(str)
+        
+        # 检查高危权限，缺少的权限列视为没有该权限
+        high_risks = users_df.reindex(columns=HIGH_RISK_PERMISSIONS) == YES
+        has_high_risk = high_risks.any(axis=1)
+        high_risk_names = high_risks.apply(lambda row: ', '.join(row.index[row]), axis=1)
+        high_df = pd.DataFrame({
+            '风险类型': '权限风险',
+            '风险等级': high_risks['超级权限'].map({True: '高', False: '中'}),
+            '检查项': USERS_SHEET,
+            '表名': '-',
+            '字段名': '-',
+            '敏感类型': '数据库权限',
+            '风险描述': '用户 ' + usernames + '@' + hosts + ' 拥有高危权限: ' + high_risk_names,
+            '检测值': high_risks.sum(axis=1).astype(str) + '个高危权限',
+            '记录总数': '-',
+            '建议': '根据最小权限原则，移除不必要的高危权限'
+        }, columns=AUDIT_COLUMNS)[has_high_risk]
         
-        return audit_results
+        # 检查通配符主机权限
+        has_data_permission = (users_df.reindex(columns=DATA_PERMISSIONS) == YES).any(axis=1)
+        wildcard_df = pd.DataFrame({
+            '风险类型': '权限风险',
+            '风险等级': '中',
+            '检查项': USERS_SHEET,
+            '表名': '-',
+            '字段名': '-',
+            '敏感类型': '主机权限',
+            '风险描述': '用户 ' + usernames + ' 允许从任意主机(%)连接并具有数据操作权限',
+            '检测值': '通配符主机权限',
+            '记录总数': '-',
+            '建议': '限制用户只能从特定主机连接，避免使用通配符(%)'
+        }, columns=AUDIT_COLUMNS)[(hosts == '%') & has_data_permission]
+        
+        # 按用户顺序排列，同一用户的高危权限记录在前
+        return pd.concat([high_df, wildcard_df]).sort_index(kind='stable')
 
+    @staticmethod
+    def _sheet_rows(records: List[Dict[str, Any]],
+                    columns: Optional[List[str]] = None) -> Tuple[List[str], Iterable[Tuple]]:
+        """
+        把字典记录转换为按列排列的行，不构建DataFrame
+        
+        Args:
+            records: 记录列表
+            columns: 列名列表，默认使用记录中出现的所有字段（内部字段除外）
+            
+        Returns:
+            (列名列表, 行迭代器)
+        """
+        if columns is None:
+            columns = [
+                column for column in dict.fromkeys(key for record in records for key in record)
+                if column != SENSITIVE_INFO_DICT_KEY
+            ]
+        return columns, (tuple(record.get(column) for column in columns) for record in records)
+    
+    @staticmethod
+    def _unique_sheet_names(databases: Iterable[str]) -> Dict[str, str]:
+        """
+        为每个数据库生成唯一的sheet名称
+        
+        Excel sheet名称最长31个字符且不区分大小写，截断后与已有名称（包括审计结果、用户权限）
+        重复时在末尾加数字后缀。
+        
+        Args:
+            databases: 数据库名称
+            
+        Returns:
+            数据库名称 -> sheet名称
+        """
+        used = {AUDIT_SHEET.lower(), USERS_SHEET.lower()}
+        sheet_names = {}
+        for database in databases:
+            sheet_name = database[:31]
+            suffix = 1
+            while sheet_name.lower() in used:
+                tag = f"_{suffix}"
+                sheet_name = database[:31 - len(tag)] + tag
+                suffix += 1
+            used.add(sheet_name.lower())
+            sheet_names[database] = sheet_name
+        return sheet_names
+    
+    @staticmethod
+    def _sheet_link(sheet_name: str) -> str:
+        """
+        获取指向sheet左上角的内部链接位置，sheet名称中的单引号需要转义
+        
+        Args:
+            sheet_name: sheet名称
+            
+        Returns:
+            链接位置，如 'test_db'!A1
+        """
+        return "'{}'!A1".format(sheet_name.replace("'", "''"))
+    
+    def _build_report_sheets(self, users: List[Dict[str, Any]],
+                             databases_info: Dict[str, List[Dict[str, Any]]],
+                             sheet_names: Dict[str, str]) -> List[Tuple[str, List[str], Iterable[Tuple], str]]:
+        """
+        按写入顺序准备报告的各个sheet，各sheet的行在写入时才逐行生成
+        
+        Args:
+            users: 用户信息列表
+            databases_info: 数据库信息字典
+            sheet_names: _unique_sheet_names 返回的数据库名称 -> sheet名称
+            
+        Returns:
+            (sheet名称, 列名列表, 行迭代器, sheet类型) 列表，sheet类型为 'audit'、'users' 或 'database'
+        """
+        sheets = []
+        
+        # 第一个sheet：审计结果汇总
+        audit_df = self._audit_summary_frame(users, databases_info)
+        if not audit_df.empty:
+            logger.info(f"写入审计结果 sheet: {len(audit_df)} 条风险记录")
+        else:
+            # 创建空的审计结果sheet
+            logger.info("创建空的审计结果 sheet")
+        sheets.append((AUDIT_SHEET, AUDIT_COLUMNS, audit_df.itertuples(index=False, name=None), 'audit'))
+        
+        # 第二个sheet：用户权限信息
+        if users:
+            logger.info(f"写入用户信息 sheet: {len(users)} 条记录")
+            sheets.append((USERS_SHEET, *self._sheet_rows(users), 'users'))
+        else:
+            # 创建空的用户sheet
+            sheets.append((USERS_SHEET, ['用户名', '主机', '权限信息'], [], 'users'))
+        
+        # 为每个数据库创建sheet
+        for database, table_info in databases_info.items():
+            sheet_name = sheet_names[database]
+            if table_info:
+                logger.info(f"写入数据库 {database} sheet: {len(table_info)} 条记录")
+                sheets.append((sheet_name, *self._sheet_rows(table_info), 'database'))
+            else:
+                # 创建空的数据库sheet
+                sheets.append((sheet_name, TABLE_COLUMNS, [], 'database'))
+        
+        return sheets
+    
+    def _write_report_xlsxwriter(self, excel_path: str, sheets: List[Tuple[str, List[str], Iterable[Tuple], str]],
+                                 link_targets: Dict[str, str]):
+        """
+        使用xlsxwriter逐行写入报告，格式以条件格式规则的形式写入
+        
+        Args:
+            excel_path: Excel文件路径
+            sheets: _build_report_sheets 返回的sheet列表
+            link_targets: (风险类型, 检查项) -> 链接的sheet名称
+        """
+        # 行按顺序写入，constant_memory 模式下每个sheet只在内存中保留当前行；
+        # 链接都通过 write_url 显式写入，不需要逐个字符串检测URL
+        workbook = xlsxwriter.Workbook(excel_path, {'constant_memory': True, 'strings_to_urls': False})
+        try:
+            formats = self._create_report_formats(workbook)
+            
+            for sheet_name, columns, rows, sheet_type in sheets:
+                worksheet = workbook.add_worksheet(sheet_name)
+                worksheet.write_row(0, 0, columns, formats['header'])
+                
+                # 审计结果sheet的检查项链接到对应的sheet
+                positions = self._column_positions(columns)
+                link_col = positions.get('检查项') if sheet_type == 'audit' else None
+                type_col = positions.get('风险类型')
+                
+                row_count = 0
+                for row_count, row in enumerate(rows, start=1):
+                    worksheet.write_row(row_count, 0, row)
+                    if link_col is not None and row[link_col]:
+                        check_item_value = row[link_col]
+                        target = link_targets.get((row[type_col], check_item_value), check_item_value[:31])
+                        worksheet.write_url(row_count, link_col, f"internal:{self._sheet_link(target)}",
+                                            formats['link'], check_item_value)
+                
+                # 审计结果按风险等级着色，users 中的"是"值和数据库的敏感信息确认列红色加粗
+                self._apply_conditional_formatting(worksheet, columns, row_count, sheet_type=sheet_type,
+                                                   formats=formats)
+        finally:
+            workbook.close()
+    
+    def _write_report_openpyxl(self, excel_path: str, sheets: List[Tuple[str, List[str], Iterable[Tuple], str]],
+                               link_targets: Dict[str, str]):
+        """
+        使用openpyxl只写模式写入报告，格式以条件格式规则的形式写入
+        
+        Args:
+            excel_path: Excel文件路径
+            sheets: _build_report_sheets 返回的sheet列表
+            link_targets: (风险类型, 检查项) -> 链接的sheet名称
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.worksheet.hyperlink import Hyperlink
+        
+        styles = _excel_styles()
+        workbook = Workbook(write_only=True)
+        
+        for sheet_name, columns, rows, sheet_type in sheets:
+            worksheet = workbook.create_sheet(title=sheet_name)
+            header = []
+            for column in columns:
+                cell = WriteOnlyCell(worksheet, value=column)
+                cell.font = styles['header_font']
+                header.append(cell)
+            worksheet.append(header)
+            
+            # 审计结果sheet的检查项链接到对应的sheet
+            positions = self._column_positions(columns)
+            link_col = positions.get('检查项') if sheet_type == 'audit' else None
+            type_col = positions.get('风险类型')
+            
+            row_count = 0
+            for row_count, row in enumerate(rows, start=1):
+                if link_col is not None and row[link_col]:
+                    row = list(row)
+                    link_cell = WriteOnlyCell(worksheet, value=row[link_col])
+                    target = link_targets.get((row[type_col], row[link_col]), row[link_col][:31])
+                    link_cell.hyperlink = Hyperlink(ref="", location=self._sheet_link(target))
+                    link_cell.font = styles['link_font']
+                    row[link_col] = link_cell
+                worksheet.append(row)
+            
+            # 条件格式在保存sheet时写入，不逐个单元格设置样式
+            self._apply_openpyxl_conditional_formatting(worksheet, columns, row_count, sheet_type)
+        
+        workbook.save(excel_path)
+    
     def generate_excel_report(self, datasource_name: str, users: List[Dict[str, Any]], 
-                            databases_info: Dict[str, List[Dict[str, Any]]]) -> str:
+                            databases_info: Dict[str, List[Dict[str, Any]]]) -> Optional[str]:
         """
         生成Excel报告
         
@@ -771,67 +1733,30 @@ class DatabaseAuditor:
             databases_info: 数据库信息字典
             
         Returns:
-            生成的Excel文件路径
+            生成的Excel文件路径，没有任何用户和表信息时不生成报告，返回None
         """
+        # 审计结果由用户和表信息汇总而来，两者都为空时没有可报告的内容
+        if not users and not any(databases_info.values()):
+            logger.info(f"数据源 {datasource_name} 没有用户和表信息，不生成报告")
+            return None
+        
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         excel_filename = f"{datasource_name}_{timestamp}.xlsx"
         excel_path = os.path.join(self.output_dir, excel_filename)
         
         try:
-            with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-                # 第一个sheet：审计结果汇总
-                audit_results = self._generate_audit_summary(users, databases_info)
-                if audit_results:
-                    audit_df = pd.DataFrame(audit_results)
-                    audit_df.to_excel(writer, sheet_name='审计结果', index=False)
-                    
-                    # 应用条件格式 - 审计结果sheet的风险等级着色
-                    self._apply_conditional_formatting(writer.book['审计结果'], audit_df, sheet_type='audit')
-                    
-                    # 添加检查项列的超链接
-                    self._add_hyperlinks_to_audit_sheet(writer.book['审计结果'], audit_df)
-                    
-                    logger.info(f"写入审计结果 sheet: {len(audit_results)} 条风险记录")
-                else:
-                    # 创建空的审计结果sheet
-                    empty_audit_df = pd.DataFrame(columns=[
-                        '风险类型', '风险等级', '检查项', '表名', '字段名', 
-                        '敏感类型', '风险描述', '检测值', '记录总数', '建议'
-                    ])
-                    empty_audit_df.to_excel(writer, sheet_name='审计结果', index=False)
-                    logger.info("创建空的审计结果 sheet")
-                
-                # 第二个sheet：用户权限信息
-                if users:
-                    users_df = pd.DataFrame(users)
-                    users_df.to_excel(writer, sheet_name='用户权限', index=False)
-                    
-                    # 应用条件格式 - users sheet中的"是"值红色加粗
-                    self._apply_conditional_formatting(writer.book['用户权限'], users_df, sheet_type='users')
-                    
-                    logger.info(f"写入用户信息 sheet: {len(users)} 条记录")
-                else:
-                    # 创建空的用户sheet
-                    empty_df = pd.DataFrame(columns=['用户名', '主机', '权限信息'])
-                    empty_df.to_excel(writer, sheet_name='用户权限', index=False)
-                
-                # 为每个数据库创建sheet
-                for database, table_info in databases_info.items():
-                    if table_info:
-                        db_df = pd.DataFrame(table_info)
-                        # Excel sheet名称长度限制为31字符
-                        sheet_name = database[:31] if len(database) > 31 else database
-                        db_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                        
-                        # 应用条件格式 - 敏感信息确认列红色加粗
-                        self._apply_conditional_formatting(writer.book[sheet_name], db_df, sheet_type='database')
-                        
-                        logger.info(f"写入数据库 {database} sheet: {len(table_info)} 条记录")
-                    else:
-                        # 创建空的数据库sheet
-                        empty_df = pd.DataFrame(columns=['表名', '字段名和值', '敏感信息', '敏感信息确认', '总条数'])
-                        sheet_name = database[:31] if len(database) > 31 else database
-                        empty_df.to_excel(writer, sheet_name=sheet_name, index=False)
+            # 数据库sheet名称只计算一次，截断后重名的加后缀，检查项按同一映射链接；
+            # 数据库可能与用户权限sheet同名，链接按风险类型区分
+            sheet_names = self._unique_sheet_names(databases_info)
+            link_targets = {('敏感信息', database): sheet_name for database, sheet_name in sheet_names.items()}
+            link_targets[('权限风险', USERS_SHEET)] = USERS_SHEET
+            
+            sheets = self._build_report_sheets(users, databases_info, sheet_names)
+            if xlsxwriter is not None:
+                self._write_report_xlsxwriter(excel_path, sheets, link_targets)
+            else:
+                # 没有安装xlsxwriter时使用openpyxl只写模式，逐行写入不保留整个工作簿
+                self._write_report_openpyxl(excel_path, sheets, link_targets)
             
             logger.info(f"Excel报告生成成功: {excel_path}")
             return excel_path
@@ -840,6 +1765,29 @@ class DatabaseAuditor:
             logger.error(f"生成Excel报告失败: {str(e)}")
             raise
     
+    def _audit_database(self, connection_factory: Callable[[], Any], database: str,
+                        max_workers: int) -> List[Dict[str, Any]]:
+        """
+        使用独立的数据库连接获取单个数据库的表信息
+        
+        Args:
+            connection_factory: 创建新数据库连接的函数
+            database: 数据库名称
+            max_workers: 处理该数据库各表的最大线程数
+            
+        Returns:
+            表信息列表
+        """
+        logger.info(f"处理数据库: {database}")
+        connection = connection_factory()
+        if not connection:
+            return []
+        
+        try:
+            return self.get_table_info(connection, database, connection_factory, max_workers)
+        finally:
+            connection.close()
+    
     def audit_datasource(self, datasource: Dict[str, Any]) -> Optional[str]:
         """
         审计单个数据源
@@ -853,8 +1801,10 @@ class DatabaseAuditor:
         logger.info(f"开始审计数据源: {datasource['datasource_name']}")
         
         # 连接数据库
+        self._acquire_pool(datasource)
         connection = self.connect_database(datasource)
         if not connection:
+            self._release_pool(datasource)
             return None
         
         try:
@@ -864,12 +1814,31 @@ class DatabaseAuditor:
             # 获取所有数据库
             databases = self.get_databases(connection)
             
-            # 获取每个数据库的表信息
+            # 获取每个数据库的表信息，多个数据库时并发处理，各数据库平分线程数
             databases_info = {}
-            for database in databases:
-                logger.info(f"处理数据库: {database}")
-                table_info = self.get_table_info(connection, database)
-                databases_info[database] = table_info
+            connection_factory = functools.partial(self.connect_database, datasource)
+            db_workers = min(self.max_db_workers or self.max_workers, len(databases))
+            if db_workers > 1:
+                table_workers = max(1, self.max_workers // db_workers)
+                results = {}
+                with ThreadPoolExecutor(max_workers=db_workers) as executor:
+                    futures = {
+                        executor.submit(self._audit_database, connection_factory, database, table_workers): database
+                        for database in databases
+                    }
+                    for future in as_completed(futures):
+                        database = futures[future]
+                        try:
+                            results[database] = future.result()
+                        except Exception as e:
+                            logger.error(f"处理数据库 {database} 失败: {str(e)}")
+                            results[database] = []
+                # 报告中的sheet顺序与数据库列表一致
+                databases_info = {database: results[database] for database in databases}
+            else:
+                for database in databases:
+                    logger.info(f"处理数据库: {database}")
+                    databases_info[database] = self.get_table_info(connection, database, connection_factory)
             
             # 生成Excel报告
             excel_path = self.generate_excel_report(
@@ -878,7 +1847,8 @@ class DatabaseAuditor:
                 databases_info
             )
             
-            logger.info(f"数据源 {datasource['datasource_name']} 审计完成")
+            if excel_path:
+                logger.info(f"数据源 {datasource['datasource_name']} 审计完成")
             return excel_path
             
         except Exception as e:
@@ -886,6 +1856,8 @@ class DatabaseAuditor:
             return None
         finally:
             connection.close()
+            # 审计完成后释放连接池中缓存的连接
+            self._release_pool(datasource)
     
     def audit_multiple_datasources(self, config_text: str) -> List[str]:
         """
@@ -897,21 +1869,36 @@ class DatabaseAuditor:
         Returns:
             生成的Excel文件路径列表
         """
+        return self.audit_multiple_datasources_iter(config_text.splitlines())
+    
+    def audit_multiple_datasources_iter(self, config_lines: Iterable[str]) -> List[str]:
+        """
+        逐行审计多个数据源，每解析出一个数据源立即提交到线程池审计，无需先读完全部配置
+        
+        各数据源是独立的数据库和独立的报告文件，最多同时审计 max_datasource_workers 个。
+        
+        Args:
+            config_lines: 数据源配置行
+            
+        Returns:
+            生成的Excel文件路径列表，顺序与配置一致
+        """
         logger.info("开始批量审计数据源")
         
-        # 解析配置
-        datasources = self.parse_datasource_config(config_text)
-        if not datasources:
+        # 审计每个数据源
+        futures = []
+        with ThreadPoolExecutor(max_workers=max(1, self.max_datasource_workers)) as executor:
+            for line in config_lines:
+                datasource = self._parse_datasource_line(line)
+                if datasource:
+                    futures.append(executor.submit(self.audit_datasource, datasource))
+        
+        excel_files = [excel_path for excel_path in (future.result() for future in futures) if excel_path]
+        
+        if not futures:
             logger.warning("没有找到有效的数据源配置")
             return []
         
-        # 审计每个数据源
-        excel_files = []
-        for datasource in datasources:
-            excel_path = self.audit_datasource(datasource)
-            if excel_path:
-                excel_files.append(excel_path)
-        
         logger.info(f"批量审计完成，生成了 {len(excel_files)} 个Excel报告")
         return excel_files
 
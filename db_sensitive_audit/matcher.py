@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# cython: boundscheck=False, wraparound=False
+"""
+字段名关键词匹配器
+Field Keyword Matcher
+
+安装时可由Cython编译为 matcher_c 扩展模块，未编译时使用本纯Python实现。
+安装了 pyahocorasick 时使用 Aho-Corasick 自动机，一次扫描字段名即可找出所有关键词。
+"""
+
+from typing import Dict, List, Set
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """字段名关键词匹配器，判断字段名包含哪些规则的关键词"""
+    
+    def __init__(self, rule_keywords: Dict[str, List[str]], case_sensitive: bool = False):
+        """
+        初始化匹配器
+        
+        Args:
+            rule_keywords: 规则名 -> 字段名关键词列表
+            case_sensitive: 是否区分大小写
+        """
+        self.case_sensitive = case_sensitive
+        
+        # 展开为 (关键词, 规则名) 列表，匹配时只需一层循环
+        self._keyword_table = []
+        for rule_name, keywords in rule_keywords.items():
+            for keyword in keywords:
+                if not case_sensitive:
+                    keyword = keyword.lower()
+                self._keyword_table.append((keyword, rule_name))
+        
+        self._automaton = self._build_automaton() if ahocorasick is not None else None
+    
+    def _build_automaton(self):
+        """
+        把全部关键词构建为Aho-Corasick自动机，每个关键词对应其所属的规则名
+        
+        Returns:
+            自动机对象，没有可用关键词时返回None
+        """
+        keyword_rules = {}
+        for keyword, rule_name in self._keyword_table:
+            keyword_rules.setdefault(keyword, []).append(rule_name)
+        
+        # 空关键词匹配任何字段名，自动机不支持，单独记录
+        self._empty_keyword_rules = set(keyword_rules.pop('', ()))
+        if not keyword_rules:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for keyword, rule_names in keyword_rules.items():
+            automaton.add_word(keyword, tuple(rule_names))
+        automaton.make_automaton()
+        return automaton
+    
+    def match(self, column: str) -> Set[str]:
+        """
+        获取字段名匹配的规则
+        
+        Args:
+            column: 字段名
+            
+        Returns:
+            字段名包含其关键词的规则名集合
+        """
+        if not self.case_sensitive:
+            column = column.lower()
+        
+        if self._automaton is not None:
+            matched = set(self._empty_keyword_rules)
+            for _, rule_names in self._automaton.iter(column):
+                matched.update(rule_names)
+            return matched
+        
+        matched = set()
+        for keyword, rule_name in self._keyword_table:
+            if rule_name not in matched and keyword in column:
+                matched.add(rule_name)
+        return matched
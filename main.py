@@ -6,7 +6,6 @@ DB Sensitive Audit
 """
 
 import sys
-from db_sensitive_audit.app import main as app_main
 
 
 def main():
@@ -25,7 +24,8 @@ def main():
         print("  python main.py audit -i    # 交互式配置")
         return
     
-    # 直接调用app的main函数
+    # 直接调用app的main函数，只显示用法时不导入应用包
+    from db_sensitive_audit import main as app_main
     app_main()
 
 
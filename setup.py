@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DB Sensitive Audit 安装脚本
+
+安装了 Cython 时会把应用模块和字段名匹配器编译为扩展模块（app_c、matcher_c），
+同时保留纯 Python 源码，没有C编译环境时依然可以正常安装和运行。
+设置环境变量 DBSA_CYTHON=False 可以跳过编译。
+"""
+
+import os
+from setuptools import setup, Extension
+
+
+def _cython_enabled() -> bool:
+    """是否启用Cython编译"""
+    return os.environ.get("DBSA_CYTHON", "True").lower() not in ("false", "0", "no")
+
+
+def get_ext_modules():
+    """获取需要编译的扩展模块列表"""
+    if not _cython_enabled():
+        return []
+
+    try:
+        from Cython.Build import cythonize
+    except ImportError:
+        return []
+
+    # 直接编译 .py 文件，不维护单独的 .pyx 副本
+    extensions = [
+        Extension("db_sensitive_audit.app_c", ["db_sensitive_audit/app.py"]),
+        Extension("db_sensitive_audit.matcher_c", ["db_sensitive_audit/matcher.py"]),
+    ]
+    return cythonize(extensions, language_level=3)
+
+
+setup(
+    name="db-sensitive-audit",
+    version="1.0.0",
+    description="数据库敏感信息审计工具",
+    packages=["db_sensitive_audit"],
+    ext_modules=get_ext_modules(),
+    python_requires=">=3.8",
+    install_requires=[
+        "pymysql>=1.0.0",
+        "pandas>=1.5.0",
+        "openpyxl>=3.0.0",
+        "xlsxwriter>=3.0.0",
+    ],
+)
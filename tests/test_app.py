@@ -7,6 +7,7 @@ Test cases for the App module
 import pytest
 import sys
 import os
+from unittest.mock import patch
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -48,6 +49,103 @@ class TestApp:
             assert True
         except Exception as e:
             pytest.fail(f"run() 方法抛出了异常: {e}")
+    
+    def test_parse_audit_args(self):
+        """测试audit参数解析"""
+        app = App()
+        parsed = app.parse_audit_args(["-f", "config.txt", "--output=reports"])
+        assert parsed.command == "audit"
+        assert parsed.file == "config.txt"
+        assert parsed.config is None
+        assert parsed.interactive is False
+        assert parsed.output == "reports"
+        
+        parsed = app.parse_audit_args(["-i"])
+        assert parsed.interactive is True
+        assert parsed.output == "audit_reports"
+    
+    def test_parse_audit_args_invalid(self):
+        """测试无效的audit参数"""
+        app = App()
+        # 缺少配置来源
+        assert app.parse_audit_args([]) is None
+        # 配置来源互斥
+        assert app.parse_audit_args(["-i", "-c", "db,localhost,3306,root,pass"]) is None
+        # 缺少参数值
+        assert app.parse_audit_args(["-f"]) is None
+        # 未知参数
+        assert app.parse_audit_args(["-x"]) is None
+
+    
+    def test_get_interactive_config(self):
+        """测试交互式配置输入"""
+        app = App()
+        inputs = [
+            "db1,localhost,3306,root,pass",
+            "invalid,line",
+            "db2,example.com,3306,admin,admin123",
+            "",
+        ]
+        with patch('builtins.input', side_effect=inputs):
+            config_text = app.get_interactive_config()
+        
+        assert config_text == "db1,localhost,3306,root,pass\ndb2,example.com,3306,admin,admin123"
+    
+    def test_audit_empty_config_file(self, tmp_path, capsys):
+        """测试配置文件为空时不执行审计"""
+        config_file = tmp_path / "empty.txt"
+        config_file.write_text("\n   \n", encoding='utf-8')
+        
+        app = App()
+        args = app.parse_audit_args(["-f", str(config_file)])
+        with patch.object(App, 'run_audit') as mock_run_audit:
+            app.handle_audit_command(args)
+        
+        mock_run_audit.assert_not_called()
+        assert "错误: 配置为空" in capsys.readouterr().out
+    
+    def test_audit_config_file_streams_lines(self, tmp_path):
+        """测试从文件逐行读取配置，跳过空行"""
+        config_file = tmp_path / "config.txt"
+        config_file.write_text("db1,localhost,3306,root,pass\n\ndb2,localhost,3306,root,pass\n", encoding='utf-8')
+        
+        app = App()
+        args = app.parse_audit_args(["-f", str(config_file), "-o", "reports"])
+        received = []
+        with patch.object(App, 'run_audit', side_effect=lambda lines, output: received.extend(lines)):
+            app.handle_audit_command(args)
+        
+        assert received == ["db1,localhost,3306,root,pass", "db2,localhost,3306,root,pass"]
+    
+    def test_audit_config_file_invalid_encoding(self, tmp_path, capsys):
+        """测试配置文件不是UTF-8编码时提示读取失败"""
+        config_file = tmp_path / "config.txt"
+        config_file.write_bytes(b"\xff\xfedb1,localhost,3306,root,pass\n")
+        
+        app = App()
+        args = app.parse_audit_args(["-f", str(config_file)])
+        with patch.object(App, 'run_audit') as mock_run_audit:
+            app.handle_audit_command(args)
+        
+        mock_run_audit.assert_not_called()
+        assert "错误: 读取配置文件失败" in capsys.readouterr().out
+    
+    def test_audit_config_file_invalid_encoding_later_line(self, tmp_path, capsys):
+        """测试后续行编码错误时停止读取，已读到的数据源照常审计"""
+        config_file = tmp_path / "config.txt"
+        # 第二行的无效字节超出第一次读取的缓冲区
+        config_file.write_bytes(b"db1,localhost,3306,root,pass\n" + b"#" * (1 << 17) + b"\n\xff\xfe\n")
+        
+        app = App()
+        args = app.parse_audit_args(["-f", str(config_file), "-o", str(tmp_path / "reports")])
+        with patch.object(app.auditor, 'audit_datasource', return_value='db1.xlsx') as mock_audit:
+            app.handle_audit_command(args)
+        
+        mock_audit.assert_called_once()
+        out = capsys.readouterr().out
+        assert "错误: 读取配置文件失败，忽略后续配置" in out
+        assert "生成了 1 个Excel报告" in out
+        assert "db1.xlsx" in out
 
 
 if __name__ == "__main__":
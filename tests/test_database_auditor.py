@@ -13,6 +13,8 @@ from unittest.mock import Mock, patch, MagicMock
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import pymysql
+
 from db_sensitive_audit.database_auditor import DatabaseAuditor
 
 
@@ -22,11 +24,33 @@ class TestDatabaseAuditor:
     def setup_method(self):
         """每个测试方法前执行"""
         self.auditor = DatabaseAuditor()
+        # 测试统一使用 pymysql 驱动
+        self.auditor._driver = pymysql
     
     def test_auditor_initialization(self):
         """测试审计器初始化"""
         assert self.auditor.output_dir == "audit_reports"
     
+    def test_load_sensitive_rules_cached(self):
+        """测试规则文件只解析一次且返回副本"""
+        rules = self.auditor.load_sensitive_rules()
+        assert '手机号' in rules['sensitive_rules']
+        
+        with patch('json.load') as mock_load:
+            rules['sensitive_rules'].clear()
+            cached_rules = self.auditor.load_sensitive_rules()
+            mock_load.assert_not_called()
+        
+        # 修改返回值不影响缓存
+        assert '手机号' in cached_rules['sensitive_rules']
+    
+    def test_load_sensitive_rules_unreadable(self):
+        """测试规则文件无法访问时使用默认规则"""
+        with patch('db_sensitive_audit.database_auditor.os.stat', side_effect=PermissionError("denied")):
+            rules = self.auditor.load_sensitive_rules()
+        
+        assert rules == self.auditor._get_default_rules()
+    
     def test_parse_datasource_config(self):
         """测试解析数据源配置"""
         config_text = """
@@ -52,11 +76,73 @@ test_db3,test.com,3306,user,pass123
         config_text = """
 invalid_line_without_enough_parts
 another,invalid,line
+bad_port,localhost,notaport,root,password
         """
         
         datasources = self.auditor.parse_datasource_config(config_text)
         assert len(datasources) == 0
     
+    def test_audit_multiple_datasources_iter(self):
+        """测试逐行审计多个数据源"""
+        lines = iter([
+            "# 注释行",
+            "test_db1,localhost,3306,root,password",
+            "invalid_line",
+            "test_db2,example.com,3306,admin,admin123",
+            "test_db3,example.com,notaport,admin,admin123",
+        ])
+        
+        reports = {'test_db1': 'a.xlsx', 'test_db2': None}
+        with patch.object(self.auditor, 'audit_datasource',
+                          side_effect=lambda ds: reports[ds['datasource_name']]) as mock_audit:
+            excel_files = self.auditor.audit_multiple_datasources_iter(lines)
+        
+        assert excel_files == ['a.xlsx']
+        assert mock_audit.call_count == 2
+        assert sorted(call[0][0]['datasource_name'] for call in mock_audit.call_args_list) == ['test_db1', 'test_db2']
+    
+    def test_audit_multiple_datasources_concurrent(self):
+        """测试多个数据源并发审计，结果顺序与配置一致"""
+        import threading
+        
+        lines = [f"db{i},host{i},3306,root,password" for i in range(3)]
+        barrier = threading.Barrier(3, timeout=5)
+        
+        def audit_datasource(datasource):
+            # 三个数据源必须同时在审计中才能通过屏障
+            barrier.wait()
+            return f"{datasource['datasource_name']}.xlsx"
+        
+        with patch.object(self.auditor, 'audit_datasource', side_effect=audit_datasource):
+            excel_files = self.auditor.audit_multiple_datasources_iter(lines)
+        
+        assert excel_files == ['db0.xlsx', 'db1.xlsx', 'db2.xlsx']
+    
+    def test_audit_datasource_concurrent_databases(self):
+        """测试多个数据库并发审计"""
+        auditor = DatabaseAuditor(max_workers=4, max_db_workers=2)
+        datasource = {'datasource_name': 'test_source'}
+        
+        def get_table_info(connection, database, connection_factory=None, max_workers=None):
+            if database == 'db2':
+                raise RuntimeError('boom')
+            assert max_workers == 2
+            return [{'表名': f'{database}_table'}]
+        
+        with patch.object(auditor, 'connect_database', side_effect=lambda ds: MagicMock()) as mock_connect, \
+                patch.object(auditor, 'get_database_users', return_value=[]), \
+                patch.object(auditor, 'get_databases', return_value=['db1', 'db2', 'db3']), \
+                patch.object(auditor, 'get_table_info', side_effect=get_table_info), \
+                patch.object(auditor, 'generate_excel_report', return_value='report.xlsx') as mock_report:
+            assert auditor.audit_datasource(datasource) == 'report.xlsx'
+        
+        databases_info = mock_report.call_args[0][2]
+        assert list(databases_info) == ['db1', 'db2', 'db3']
+        assert databases_info['db1'] == [{'表名': 'db1_table'}]
+        assert databases_info['db2'] == []
+        # 主连接加上每个数据库一个连接
+        assert mock_connect.call_count == 4
+    
     def test_ensure_output_dir(self):
         """测试确保输出目录存在"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -86,7 +172,9 @@ another,invalid,line
             'password': 'password'
         }
         
-        connection = self.auditor.connect_database(datasource)
+        # 未安装DBUtils时直接建立连接
+        with patch('db_sensitive_audit.database_auditor.PooledDB', None):
+            connection = self.auditor.connect_database(datasource)
         
         assert connection == mock_connection
         mock_connect.assert_called_once_with(
@@ -100,6 +188,57 @@ another,invalid,line
             write_timeout=30
         )
     
+    def test_connect_database_pooled(self):
+        """测试安装了DBUtils时从连接池获取连接"""
+        datasource = {
+            'datasource_name': 'test_db',
+            'ip': 'localhost',
+            'port': 3306,
+            'username': 'root',
+            'password': 'password'
+        }
+        mock_pool_class = Mock()
+        mock_pool = mock_pool_class.return_value
+        
+        with patch('db_sensitive_audit.database_auditor.PooledDB', mock_pool_class):
+            first = self.auditor.connect_database(datasource)
+            second = self.auditor.connect_database(datasource)
+            self.auditor._release_pool(datasource)
+        
+        # 同一数据源只创建一个连接池
+        mock_pool_class.assert_called_once()
+        assert mock_pool_class.call_args[1]['host'] == 'localhost'
+        assert mock_pool_class.call_args[1]['maxcached'] == self.auditor.max_workers
+        assert first is mock_pool.connection.return_value
+        assert second is mock_pool.connection.return_value
+        mock_pool.close.assert_called_once()
+        assert self.auditor._pools == {}
+    
+    def test_connection_pool_shared_by_datasources(self):
+        """测试指向同一服务器的数据源共用连接池，最后一个审计结束时才关闭"""
+        first = {'datasource_name': 'a', 'ip': 'localhost', 'port': 3306, 'username': 'root', 'password': 'pw'}
+        second = dict(first, datasource_name='b')
+        mock_pool_class = Mock()
+        mock_pool = mock_pool_class.return_value
+        
+        with patch('db_sensitive_audit.database_auditor.PooledDB', mock_pool_class):
+            self.auditor._acquire_pool(first)
+            self.auditor._acquire_pool(second)
+            self.auditor.connect_database(first)
+            self.auditor.connect_database(second)
+            
+            self.auditor._release_pool(first)
+            mock_pool.close.assert_not_called()
+            # 仍在审计的数据源继续使用原来的连接池
+            self.auditor.connect_database(second)
+            mock_pool_class.assert_called_once()
+            
+            self.auditor._release_pool(second)
+        
+        mock_pool.close.assert_called_once()
+        assert self.auditor._pools == {}
+        assert self.auditor._pool_users == {}
+    
     @patch('pymysql.connect')
     def test_connect_database_failure(self, mock_connect):
         """测试连接数据库失败"""
@@ -129,9 +268,10 @@ another,invalid,line
         mock_cursor.description = [
             ('用户名',), ('主机',), ('查询权限',), ('插入权限',)
         ]
-        mock_cursor.fetchall.return_value = [
-            ('root', 'localhost', 'Y', 'Y'),
-            ('user1', '%', 'Y', 'N')
+        mock_cursor.fetchmany.side_effect = [
+            [('root', 'localhost', 'Y', 'Y'),
+             ('user1', '%', 'Y', 'N')],
+            []
         ]
         
         users = self.auditor.get_database_users(mock_connection)
@@ -140,6 +280,24 @@ another,invalid,line
         assert users[0]['用户名'] == 'root'
         assert users[0]['查询权限'] == '是'
         assert users[1]['插入权限'] == '否'
+        # 非Y/N的值保持不变
+        assert users[1]['用户名'] == 'user1'
+        assert users[1]['主机'] == '%'
+    
+    def test_get_database_users_keeps_other_values(self):
+        """测试权限转换只影响Y/N值"""
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.__enter__ = Mock(return_value=mock_cursor)
+        mock_cursor.__exit__ = Mock(return_value=None)
+        
+        mock_cursor.description = [('用户名',), ('主机',), ('查询权限',), ('插入权限',)]
+        mock_cursor.fetchmany.side_effect = [[('app', 'localhost', None, '')], []]
+        
+        users = self.auditor.get_database_users(mock_connection)
+        
+        assert users == [{'用户名': 'app', '主机': 'localhost', '查询权限': None, '插入权限': ''}]
     
     def test_get_databases(self):
         """测试获取数据库列表"""
@@ -150,13 +308,14 @@ another,invalid,line
         mock_cursor.__exit__ = Mock(return_value=None)
         
         # 模拟SHOW DATABASES结果
-        mock_cursor.fetchall.return_value = [
-            ('information_schema',),
-            ('mysql',),
-            ('performance_schema',),
-            ('sys',),
-            ('business_db1',),
-            ('business_db2',)
+        mock_cursor.fetchmany.side_effect = [
+            [('information_schema',),
+             ('mysql',),
+             ('performance_schema',),
+             ('sys',)],
+            [('business_db1',),
+             ('business_db2',)],
+            []
         ]
         
         databases = self.auditor.get_databases(mock_connection)
@@ -175,18 +334,17 @@ another,invalid,line
         mock_cursor.__enter__ = Mock(return_value=mock_cursor)
         mock_cursor.__exit__ = Mock(return_value=None)
         
-        # 模拟SHOW TABLES结果
         mock_cursor.fetchall.side_effect = [
-            [('table1',), ('table2',)],  # SHOW TABLES
-            [('id',), ('name',), ('phone',)],  # DESCRIBE table1 (包含phone字段)
-            [('id',), ('title',)],  # DESCRIBE table2
-        ]
-        
-        # 模拟fetchone结果
-        mock_cursor.fetchone.side_effect = [
-            (100,),  # COUNT(*) table1
-            (1, 'John', '13812345678'),  # SELECT * FROM table1 LIMIT 1 OFFSET x (包含手机号)
-            (0,)  # COUNT(*) table2 (空表)
+            [('table1', 100), ('table2', 0)],  # information_schema.tables 表名和估算记录数
+            [  # information_schema.columns 所有表的字段
+                ('table1', 'id', 'int(11)', 'NO', ''),  # table1 包含phone字段，无主键
+                ('table1', 'name', 'varchar(64)', 'YES', ''),
+                ('table1', 'phone', 'varchar(20)', 'YES', ''),
+                ('table2', 'id', 'int(11)', 'NO', 'PRI'),  # table2 整数主键
+                ('table2', 'title', 'varchar(64)', 'YES', ''),
+            ],
+            [(1, 'John', '13812345678')],  # SELECT * FROM table1 LIMIT k OFFSET x (包含手机号)
+            [],  # 按主键范围抽样 table2 (空表)
         ]
         
         table_info = self.auditor.get_table_info(mock_connection, 'test_db')
@@ -219,6 +377,9 @@ another,invalid,line
         assert '敏感信息确认' in table1_record
         assert table1_record['敏感信息确认'] == '是'  # 因为手机号格式正确
         
+        # 同时保留敏感信息字典供汇总使用
+        assert table1_record['_sensitive_info_dict'] == sensitive_info
+        
         # 检查table2的记录（空表）
         table2_record = next((info for info in table_info if info['表名'] == 'table2'), None)
         assert table2_record is not None
@@ -236,6 +397,164 @@ another,invalid,line
         
         # 空表的敏感信息确认应该是"否"
         assert table2_record['敏感信息确认'] == '否'
+        
+        # 字段信息一次查询获取，不逐表DESCRIBE
+        executed_sql = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert not any(sql.startswith('DESCRIBE') for sql in executed_sql)
+    
+    def test_get_table_info_exact_counts(self):
+        """测试关闭估算时使用COUNT(*)获取精确记录数"""
+        self.auditor.approximate_counts = False
+        
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.__enter__ = Mock(return_value=mock_cursor)
+        mock_cursor.__exit__ = Mock(return_value=None)
+        
+        mock_cursor.fetchall.side_effect = [
+            [('table1', 1), ('table2', 0)],  # information_schema.tables 表名和估算记录数
+            [('table1', 42), ('table2', 7)],  # UNION ALL 合并的 COUNT(*)
+            [('table1', 'id', 'int(11)', 'NO', 'PRI'),
+             ('table2', 'id', 'int(11)', 'NO', 'PRI')],  # information_schema.columns
+            [(1,)],  # 按主键范围抽样 table1
+            [(1,)],  # 按主键范围抽样 table2
+        ]
+        
+        table_info = self.auditor.get_table_info(mock_connection, 'test_db')
+        
+        assert [info['总条数'] for info in table_info] == [42, 7]
+        mock_cursor.execute.assert_any_call(
+            "SELECT %s, COUNT(*) FROM `table1` UNION ALL SELECT %s, COUNT(*) FROM `table2`",
+            ['table1', 'table2']
+        )
+        mock_cursor.fetchone.assert_not_called()
+    
+    def test_get_table_info_exact_counts_fallback(self):
+        """测试合并统计失败时逐表执行COUNT(*)"""
+        self.auditor.approximate_counts = False
+        
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.__enter__ = Mock(return_value=mock_cursor)
+        mock_cursor.__exit__ = Mock(return_value=None)
+        
+        def execute(sql, args=None):
+            if 'UNION ALL' in sql or sql.startswith('SELECT %s, COUNT(*)'):
+                raise Exception("View references invalid table")
+        mock_cursor.execute.side_effect = execute
+        mock_cursor.fetchall.side_effect = [
+            [('table1', 1)],  # information_schema.tables 表名和估算记录数
+            [('table1', 'id', 'int(11)', 'NO', 'PRI')],  # information_schema.columns
+            [(1,)],  # 按主键范围抽样 table1
+        ]
+        mock_cursor.fetchone.side_effect = [(42,)]  # COUNT(*) table1
+        
+        table_info = self.auditor.get_table_info(mock_connection, 'test_db')
+        
+        assert table_info[0]['总条数'] == 42
+        executed_sql = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert "SELECT COUNT(*) FROM `table1`" in executed_sql
+    
+    def test_get_table_info_concurrent(self):
+        """测试使用独立连接并发获取表信息"""
+        def make_connection():
+            cursor = MagicMock()
+            cursor.__enter__.return_value = cursor
+            
+            cursor.fetchall.return_value = [(1, '13812345678')]
+            connection = MagicMock()
+            connection.cursor.return_value = cursor
+            return connection
+        
+        main_connection = make_connection()
+        main_cursor = main_connection.cursor.return_value
+        main_cursor.fetchall.side_effect = [
+            [('t1', 10), ('t2', 10), ('t3', 10)],  # information_schema.tables 表名和估算记录数
+            [  # information_schema.columns
+                (table, column, column_type, 'YES', '')
+                for table in ('t1', 't2', 't3')
+                for column, column_type in (('id', 'int(11)'), ('phone', 'varchar(20)'))
+            ],
+        ]
+        
+        worker_connections = []
+        
+        def connection_factory():
+            connection = make_connection()
+            worker_connections.append(connection)
+            return connection
+        
+        table_info = self.auditor.get_table_info(main_connection, 'test_db', connection_factory, max_workers=2)
+        
+        # 结果顺序与表顺序一致
+        assert [info['表名'] for info in table_info] == ['t1', 't2', 't3']
+        assert all(info['敏感信息确认'] == '是' for info in table_info)
+        assert all(info['总条数'] == 10 for info in table_info)
+        
+        # 工作线程连接数不超过线程数，且全部关闭
+        assert 1 <= len(worker_connections) <= 2
+        for connection in worker_connections:
+            connection.close.assert_called_once()
+    
+    def test_get_table_info_concurrent_use_failure(self):
+        """测试工作线程连接切换数据库失败时只影响当前表，不缓存该连接"""
+        import json
+        
+        def make_connection(fail_use=False):
+            cursor = MagicMock()
+            cursor.__enter__.return_value = cursor
+            if fail_use:
+                cursor.execute.side_effect = Exception("Unknown database")
+            cursor.fetchall.return_value = [(1, '13812345678')]
+            connection = MagicMock()
+            connection.cursor.return_value = cursor
+            return connection
+        
+        main_connection = make_connection()
+        main_connection.cursor.return_value.fetchall.side_effect = [
+            [('t1', 10), ('t2', 10), ('t3', 10)],  # information_schema.tables 表名和估算记录数
+            [  # information_schema.columns
+                (table, column, column_type, 'YES', '')
+                for table in ('t1', 't2', 't3')
+                for column, column_type in (('id', 'int(11)'), ('phone', 'varchar(20)'))
+            ],
+        ]
+        
+        worker_connections = []
+        
+        def connection_factory():
+            connection = make_connection(fail_use=not worker_connections)
+            worker_connections.append(connection)
+            return connection
+        
+        table_info = self.auditor.get_table_info(main_connection, 'test_db', connection_factory, max_workers=2)
+        
+        # 所有表都有记录，只有一张表因连接失败记为错误
+        assert sorted(info['表名'] for info in table_info) == ['t1', 't2', 't3']
+        errors = [info for info in table_info if json.loads(info['字段名和值']) == {'error': 'Unknown database'}]
+        assert len(errors) == 1
+        assert sum(info['敏感信息确认'] == '是' for info in table_info) == 2
+        for connection in worker_connections:
+            connection.close.assert_called_once()
+    
+    def test_get_integer_primary_key(self):
+        """测试识别整数主键"""
+        describe_rows = [
+            ('id', b'bigint unsigned', 'NO', 'PRI', None, 'auto_increment'),
+            ('name', 'varchar(64)', 'YES', '', None, ''),
+        ]
+        assert self.auditor._get_integer_primary_key(describe_rows) == 'id'
+        
+        # 非整数主键
+        assert self.auditor._get_integer_primary_key([('code', 'varchar(32)', 'NO', 'PRI', None, '')]) is None
+        
+        # 联合主键
+        assert self.auditor._get_integer_primary_key([
+            ('a', 'int(11)', 'NO', 'PRI', None, ''),
+            ('b', 'int(11)', 'NO', 'PRI', None, ''),
+        ]) is None
     
     def test_identify_sensitive_info(self):
         """测试敏感信息识别功能"""
@@ -299,6 +618,121 @@ another,invalid,line
         assert result3['身份证号']['id_card']['field_match'] == True
         assert result3['身份证号']['id_card']['value_match'] == False
 
+    def test_identify_sensitive_info_excludes_test_data(self):
+        """测试包含测试数据关键词的值被排除（忽略大小写）"""
+        import copy
+        
+        columns = ['phone', 'mobile']
+        record = ('DEMO', 'Sample-13912345678')
+        assert self.auditor.identify_sensitive_info(columns, record) == {}
+        
+        # 关闭测试数据排除后正常识别
+        rules_config = copy.deepcopy(self.auditor._rules_config)
+        rules_config.setdefault('settings', {})['exclude_test_data'] = False
+        self.auditor._compile_rules(rules_config)
+        result = self.auditor.identify_sensitive_info(columns, record)
+        assert set(result['手机号']) == {'phone', 'mobile'}
+        assert result['手机号']['phone']['value'] == 'DEMO'
+        assert result['手机号']['phone']['value_match'] == False
+    
+    def test_identify_sensitive_info_long_value(self):
+        """测试超长值被跳过、显示值被截断"""
+        max_length = self.auditor._max_field_length
+        
+        # 超过长度限制的值不参与识别
+        result = self.auditor.identify_sensitive_info(['phone'], ('1' * (max_length + 1),))
+        assert result == {}
+        
+        # 显示值去除首尾空白，超过50个字符时截断
+        value = ' ' + 'a' * 60 + ' '
+        result = self.auditor.identify_sensitive_info(['phone'], (value,))
+        assert result['手机号']['phone']['value'] == 'a' * 50 + '...'
+        assert result == self.auditor.identify_sensitive_info_batch(['phone'], [(value,)])
+    
+    def test_identify_sensitive_info_non_text_values(self):
+        """测试日期时间和二进制值不做正则匹配"""
+        from datetime import datetime
+        
+        record = (datetime(2024, 1, 1, 12, 0), b'123456789')
+        result = self.auditor.identify_sensitive_info(['created_at', 'payload'], record)
+        assert result == {}
+        assert self.auditor.identify_sensitive_info_batch(['created_at', 'payload'], [record]) == {}
+        
+        # 字段名匹配时仍然记录显示值
+        result = self.auditor.identify_sensitive_info(['phone'], (b'13812345678',))
+        assert result['手机号']['phone'] == {"value": "b'13812345678'", "field_match": True, "value_match": False}
+        assert result == self.auditor.identify_sensitive_info_batch(['phone'], [(b'13812345678',)])
+    
+    def test_combine_patterns(self):
+        """测试同一规则的多个正则合并为一个"""
+        import re
+        
+        combined = self.auditor._combine_patterns([re.compile(r'^1[3-9]\d{9}$'), re.compile(r'^\+861[3-9]\d{9}$')])
+        assert combined.match('13812345678')
+        assert combined.match('+8613812345678')
+        assert not combined.match('12345')
+        
+        single = re.compile(r'^\d+$')
+        assert self.auditor._combine_patterns([single]) is single
+        assert self.auditor._combine_patterns([]) is None
+        # 带全局标志的正则无法合并
+        assert self.auditor._combine_patterns([re.compile('(?i)^abc$'), re.compile('(?i)^def$')]) is None
+    
+    def test_field_only_detect(self):
+        """测试空表只根据字段名识别敏感信息"""
+        columns = ['id', 'phone', 'mobile_no', 'title']
+        
+        result = self.auditor._field_only_detect(columns)
+        assert result == self.auditor.identify_sensitive_info(columns, (None,) * len(columns))
+        assert result == {
+            '手机号': {
+                'phone': {'value': None, 'field_match': True, 'value_match': False},
+                'mobile_no': {'value': None, 'field_match': True, 'value_match': False},
+            }
+        }
+        assert self.auditor._field_only_detect(['id', 'title']) == {}
+    
+    def test_identify_sensitive_info_batch(self):
+        """测试批量敏感信息识别功能"""
+        columns = ['id', 'phone', 'some_field']
+        records = [
+            (1, '+8613812345678', None),
+            (2, '13812345678', 'test13912345678'),  # some_field为测试数据，应被排除
+            (3, None, '13912345678'),
+        ]
+        
+        sensitive_info = self.auditor.identify_sensitive_info_batch(columns, records)
+        
+        # 任意一条记录的值匹配即为值匹配，显示第一条匹配的值
+        assert sensitive_info['手机号']['phone'] == {
+            'value': '13812345678',
+            'field_match': True,
+            'value_match': True
+        }
+        assert sensitive_info['手机号']['some_field']['value'] == '13912345678'
+        assert sensitive_info['手机号']['some_field']['field_match'] == False
+        assert sensitive_info['手机号']['some_field']['value_match'] == True
+        
+        # 单条记录时与逐条识别结果一致
+        for record in records:
+            assert (self.auditor.identify_sensitive_info_batch(columns, [record]) ==
+                    self.auditor.identify_sensitive_info(columns, record))
+        
+        # 空记录
+        assert self.auditor.identify_sensitive_info_batch(columns, []) == {}
+    
+    def test_identify_sensitive_info_batch_uses_pattern_set(self):
+        """测试批量识别通过RE2多模式匹配集合判断值匹配"""
+        pattern_set = Mock()
+        pattern_set.Match.side_effect = lambda value: [0] if value == 'secret' else []
+        self.auditor._pattern_set = pattern_set
+        self.auditor._pattern_owners = ['银行卡号']
+        
+        sensitive_info = self.auditor.identify_sensitive_info_batch(['note'], [('plain',), ('secret',)])
+        
+        assert sensitive_info == {'银行卡号': {'note': {'value': 'secret', 'field_match': False, 'value_match': True}}}
+        assert [call[0][0] for call in pattern_set.Match.call_args_list] == ['plain', 'secret']
+
     def test_confirm_sensitive_data(self):
         """测试敏感信息确认功能"""
         # 测试真实敏感数据确认
@@ -352,6 +786,228 @@ another,invalid,line
         result = self.auditor.confirm_sensitive_data(field_only_info)
         assert result == '否'
     
+    def test_setup_logger_once(self):
+        """测试重复配置日志时复用同一个队列处理器，控制台处理器同步输出"""
+        import logging.handlers
+        from db_sensitive_audit.database_auditor import setup_logger
+        
+        logger = setup_logger()
+        assert setup_logger() is logger
+        assert len(logger.handlers) == 2
+        assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+        assert type(logger.handlers[1]) is logging.StreamHandler
+    
+    def test_json_dumps(self):
+        """测试JSON序列化与标准库输出一致"""
+        import json
+        from db_sensitive_audit import database_auditor
+        
+        data = {'姓名': '张三', 'age': 30, 'score': 1.5, 'active': True, 'memo': None}
+        expected = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        assert database_auditor._json_dumps(data) == expected
+        
+        # 超过64位的整数回退到标准库
+        assert database_auditor._json_dumps({'id': 2 ** 70}) == '{"id":%d}' % 2 ** 70
+        
+        # 非JSON类型转换为 str()，与是否安装orjson无关
+        from datetime import datetime
+        from decimal import Decimal
+        
+        values = {'created': datetime(2024, 1, 2, 3, 4, 5), 'amount': Decimal('1.50'), 'raw': b'ab'}
+        expected_values = '{"created":"2024-01-02 03:04:05","amount":"1.50","raw":"b\'ab\'"}'
+        assert database_auditor._json_dumps(values) == expected_values
+        
+        with patch.object(database_auditor, 'orjson', None):
+            assert database_auditor._json_dumps(data) == expected
+            assert database_auditor._json_dumps(values) == expected_values
+    
+    def test_json_loads(self):
+        """测试JSON解析"""
+        from db_sensitive_audit import database_auditor
+        
+        text = '{"手机号":{"phone":{"value":"13812345678"}}}'
+        expected = {'手机号': {'phone': {'value': '13812345678'}}}
+        assert database_auditor._json_loads(text) == expected
+        with pytest.raises(ValueError):
+            database_auditor._json_loads('not json')
+        
+        with patch.object(database_auditor, 'orjson', None):
+            assert database_auditor._json_loads(text) == expected
+            with pytest.raises(ValueError):
+                database_auditor._json_loads('not json')
+    
+    def test_generate_excel_report_nothing_to_report(self):
+        """测试没有用户和表信息时不生成报告"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.auditor.output_dir = temp_dir
+            assert self.auditor.generate_excel_report('test_source', [], {'empty_db': []}) is None
+            assert self.auditor.generate_excel_report('test_source', [], {}) is None
+            assert os.listdir(temp_dir) == []
+    
+    def test_build_report_sheets(self):
+        """测试报告sheet直接按列生成元组行，不包含内部字段"""
+        users = [{'用户名': 'root', '主机': '%', '超级权限': '是'}]
+        databases_info = {
+            'db1': [{'表名': 'a', '字段名和值': '{}', '敏感信息': '{}', '敏感信息确认': '否', '总条数': 0,
+                     '_sensitive_info_dict': {}}],
+            'db2': [],
+        }
+        sheet_names = self.auditor._unique_sheet_names(databases_info)
+        
+        sheets = self.auditor._build_report_sheets(users, databases_info, sheet_names)
+        
+        assert [(name, sheet_type) for name, _, _, sheet_type in sheets] == [
+            ('审计结果', 'audit'), ('用户权限', 'users'), ('db1', 'database'), ('db2', 'database')
+        ]
+        rows = {name: list(rows) for name, _, rows, _ in sheets}
+        assert all(type(row) is tuple for sheet_rows in rows.values() for row in sheet_rows)
+        assert len(rows['审计结果']) == 1
+        assert rows['用户权限'] == [('root', '%', '是')]
+        assert sheets[2][1] == ['表名', '字段名和值', '敏感信息', '敏感信息确认', '总条数']
+        assert rows['db1'] == [('a', '{}', '{}', '否', 0)]
+        assert rows['db2'] == []
+    
+    def test_unique_sheet_names(self):
+        """测试数据库sheet名称截断后去重"""
+        prefix = 'a' * 31
+        sheet_names = DatabaseAuditor._unique_sheet_names([prefix + '_1', prefix + '_2', 'A' * 31, '用户权限', 'db'])
+        
+        assert sheet_names == {
+            prefix + '_1': prefix,
+            prefix + '_2': 'a' * 29 + '_1',
+            'A' * 31: 'A' * 29 + '_2',  # sheet名称不区分大小写
+            '用户权限': '用户权限_1',  # 不与固定sheet重名
+            'db': 'db',
+        }
+        assert all(len(name) <= 31 for name in sheet_names.values())
+    
+    def test_generate_excel_report_long_database_names(self):
+        """测试截断后同名的数据库各自生成sheet，超链接指向正确的sheet"""
+        from openpyxl import load_workbook
+        
+        prefix = 'x' * 31
+        row = {'表名': 't', '字段名和值': '{}', '敏感信息': '{"手机号":{"phone":{"value":"13812345678",'
+               '"field_match":true,"value_match":true}}}', '敏感信息确认': '是', '总条数': 1}
+        databases_info = {prefix + '_a': [row], prefix + '_b': [row]}
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.auditor.output_dir = temp_dir
+            excel_path = self.auditor.generate_excel_report('test_source', [], databases_info)
+            
+            workbook = load_workbook(excel_path)
+            assert workbook.sheetnames == ['审计结果', '用户权限', prefix, 'x' * 29 + '_1']
+            audit_sheet = workbook['审计结果']
+            links = [audit_sheet.cell(row=r, column=3).hyperlink.location for r in (2, 3)]
+            assert links == [f"'{prefix}'!A1", f"'{'x' * 29}_1'!A1"]
+            workbook.close()
+    
+    @pytest.mark.parametrize('use_xlsxwriter', [True, False])
+    def test_generate_excel_report_database_named_like_users_sheet(self, use_xlsxwriter):
+        """测试数据库与用户权限sheet同名时，权限风险和敏感信息分别链接到各自的sheet"""
+        from openpyxl import load_workbook
+        from db_sensitive_audit import database_auditor
+        
+        users = [{'用户名': 'root', '主机': '%', '查询权限': '是', '超级权限': '是'}]
+        row = {'表名': 't', '字段名和值': '{}', '敏感信息': '{"手机号":{"phone":{"value":"13812345678",'
+               '"field_match":true,"value_match":true}}}', '敏感信息确认': '是', '总条数': 1}
+        databases_info = {'用户权限': [row]}
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.auditor.output_dir = temp_dir
+            if use_xlsxwriter:
+                excel_path = self.auditor.generate_excel_report('test_source', users, databases_info)
+            else:
+                with patch.object(database_auditor, 'xlsxwriter', None):
+                    excel_path = self.auditor.generate_excel_report('test_source', users, databases_info)
+            
+            workbook = load_workbook(excel_path)
+            assert workbook.sheetnames == ['审计结果', '用户权限', '用户权限_1']
+            audit_sheet = workbook['审计结果']
+            links = [(audit_sheet.cell(row=r, column=1).value, audit_sheet.cell(row=r, column=3).hyperlink.location)
+                     for r in range(2, audit_sheet.max_row + 1)]
+            assert links == [
+                ('敏感信息', "'用户权限_1'!A1"),
+                ('权限风险', "'用户权限'!A1"),
+                ('权限风险', "'用户权限'!A1"),
+            ]
+            workbook.close()
+    
+    def test_table_error_record(self):
+        """测试错误记录中的JSON在错误信息包含引号时仍然有效"""
+        import json
+        from db_sensitive_audit.database_auditor import NO
+        
+        record = self.auditor._table_error_record('t1', 'Table "t1" doesn\'t exist')
+        assert json.loads(record['字段名和值']) == {'error': 'Table "t1" doesn\'t exist'}
+        assert json.loads(record['敏感信息']) == {'error': '获取失败'}
+        assert record['敏感信息确认'] is NO
+    
+    def test_column_positions(self):
+        """测试按列名获取列位置"""
+        positions = DatabaseAuditor._column_positions(['表名', '敏感信息确认', '总条数'])
+        assert positions.get('敏感信息确认') == 1
+        assert positions.get('风险等级') is None
+    
+    @pytest.mark.parametrize('use_xlsxwriter', [True, False])
+    def test_generate_excel_report(self, use_xlsxwriter):
+        """测试生成Excel报告（xlsxwriter 和 openpyxl只写模式）"""
+        from openpyxl import load_workbook
+        from db_sensitive_audit import database_auditor
+        
+        users = [
+            {'用户名': 'root', '主机': '%', '查询权限': '是', '超级权限': '是'},
+        ]
+        databases_info = {
+            'test_db': [
+                {
+                    '表名': 'users',
+                    '字段名和值': '{"phone":"13812345678"}',
+                    '敏感信息': '{"手机号":{"phone":{"value":"13812345678","field_match":true,"value_match":true}}}',
+                    '敏感信息确认': '是',
+                    '总条数': 100
+                }
+            ],
+            'empty_db': []
+        }
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.auditor.output_dir = temp_dir
+            if use_xlsxwriter:
+                excel_path = self.auditor.generate_excel_report('test_source', users, databases_info)
+            else:
+                with patch.object(database_auditor, 'xlsxwriter', None):
+                    excel_path = self.auditor.generate_excel_report('test_source', users, databases_info)
+            
+            workbook = load_workbook(excel_path)
+            assert workbook.sheetnames == ['审计结果', '用户权限', 'test_db', 'empty_db']
+            
+            # 审计结果sheet：检查项列带有跳转到对应sheet的超链接
+            audit_sheet = workbook['审计结果']
+            header = [cell.value for cell in audit_sheet[1]]
+            check_item_col = header.index('检查项') + 1
+            links = {}
+            for row in range(2, audit_sheet.max_row + 1):
+                cell = audit_sheet.cell(row=row, column=check_item_col)
+                links[cell.value] = cell.hyperlink.location if cell.hyperlink else None
+            assert links == {'test_db': "'test_db'!A1", '用户权限': "'用户权限'!A1"}
+            
+            # 数据库sheet
+            db_sheet = workbook['test_db']
+            assert [cell.value for cell in db_sheet[1]] == ['表名', '字段名和值', '敏感信息', '敏感信息确认', '总条数']
+            assert [cell.value for cell in db_sheet[2]][0] == 'users'
+            assert [cell.value for cell in db_sheet[2]][3] == '是'
+            assert [cell.value for cell in db_sheet[2]][4] == 100
+            
+            # 格式化以条件格式规则写入，而不是逐个单元格设置样式
+            assert [str(rng.sqref) for rng in db_sheet.conditional_formatting] == ['D2']
+            assert [str(rng.sqref) for rng in workbook['用户权限'].conditional_formatting] == ['A2:D2']
+            assert sorted(str(rng.sqref) for rng in audit_sheet.conditional_formatting) == ['A2:J4', 'B2:B4']
+            assert not db_sheet['D2'].font.bold
+            
+            # 空数据库sheet只有表头
+            assert workbook['empty_db'].max_row == 1
+            workbook.close()
+    
     def test_generate_audit_summary(self):
         """测试审计结果汇总生成"""
         # 准备测试数据
@@ -391,7 +1047,7 @@ another,invalid,line
         }
         
         # 生成审计结果
-        audit_results = self.auditor._generate_audit_summary(users, databases_info)
+        audit_results = self.auditor._audit_summary_frame(users, databases_info).to_dict('records')
         
         # 验证结果
         assert len(audit_results) > 0
@@ -418,6 +1074,73 @@ another,invalid,line
         assert len(wildcard_risks) == 1
         assert wildcard_risks[0]['风险等级'] == '中'
         assert wildcard_risks[0]['检查项'] == '用户权限'
+    
+    def test_generate_audit_summary_order(self):
+        """测试审计结果的排序和汇总描述"""
+        import json
+        
+        users = [
+            {'用户名': 'root', '主机': '%', '查询权限': '是', '超级权限': '是', '文件权限': '是'},
+            {'用户名': 'ops', '主机': '%', '查询权限': '是', '进程权限': '是'},
+            {'用户名': 'app', '主机': '%', '插入权限': '是', '超级权限': '否'},
+            {'用户名': 'ro', '主机': 'localhost', '查询权限': '是'},
+        ]
+        phones = {f'phone{i}': {'value': f'1381234567{i}', 'field_match': True, 'value_match': True}
+                  for i in range(4)}
+        databases_info = {
+            'db1': [
+                {'表名': 'a', '敏感信息': json.dumps({'手机号': phones}), '敏感信息确认': '是', '总条数': 7},
+                {'表名': 'b', '敏感信息': '{}', '敏感信息确认': '是', '总条数': 1},
+                {'表名': 'c', '敏感信息': 'not json', '敏感信息确认': '是', '总条数': 1},
+            ],
+            'db2': [],
+        }
+        
+        audit_results = self.auditor._audit_summary_frame(users, databases_info).to_dict('records')
+        
+        assert [r['风险描述'] for r in audit_results] == [
+            '表 a 包含敏感信息: 手机号',
+            '用户 root@% 拥有高危权限: 超级权限, 文件权限',
+            '用户 root 允许从任意主机(%)连接并具有数据操作权限',
+            '用户 ops@% 拥有高危权限: 进程权限',
+            '用户 ops 允许从任意主机(%)连接并具有数据操作权限',
+            '用户 app 允许从任意主机(%)连接并具有数据操作权限',
+        ]
+        assert list(audit_results[0]) == ['风险类型', '风险等级', '检查项', '表名', '字段名',
+                                          '敏感类型', '风险描述', '检测值', '记录总数', '建议']
+        assert audit_results[0]['字段名'] == 'phone0(手机号)、phone1(手机号)、phone2(手机号)等4个字段'
+        assert audit_results[0]['检测值'] == '1381234567...、1381234567......'
+        assert audit_results[0]['记录总数'] == 7
+        assert audit_results[1]['检测值'] == '2个高危权限'
+        assert audit_results[3]['风险等级'] == '中'
+        
+        assert self.auditor._audit_summary_frame([], {}).empty
+        
+        # 取值很少的列使用分类类型
+        audit_df = self.auditor._audit_summary_frame(users, databases_info)
+        assert audit_df['风险等级'].dtype == 'category'
+        assert audit_df['风险类型'].dtype == 'category'
+    
+    def test_generate_audit_summary_uses_dict(self):
+        """测试汇总时直接使用扫描时保留的敏感信息字典"""
+        from db_sensitive_audit.database_auditor import SENSITIVE_INFO_DICT_KEY
+        
+        sensitive_info = {'手机号': {'phone': {'value': '13812345678', 'field_match': True, 'value_match': True}}}
+        databases_info = {
+            'test_db': [{
+                '表名': 'users',
+                '敏感信息': '',  # 不会被解析
+                '敏感信息确认': '是',
+                '总条数': 1,
+                SENSITIVE_INFO_DICT_KEY: sensitive_info
+            }]
+        }
+        
+        with patch('db_sensitive_audit.database_auditor._json_loads') as mock_loads:
+            audit_results = self.auditor._audit_summary_frame([], databases_info).to_dict('records')
+        
+        mock_loads.assert_not_called()
+        assert audit_results[0]['字段名'] == 'phone(手机号)'
 
 
 if __name__ == "__main__":
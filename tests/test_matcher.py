@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test cases for the matcher module
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_sensitive_audit import matcher as matcher_module
+from db_sensitive_audit.matcher import KeywordMatcher
+
+
+class TestKeywordMatcher:
+    """KeywordMatcher类的测试用例"""
+    
+    def setup_method(self):
+        """每个测试方法前执行"""
+        self.rule_keywords = {
+            '手机号': ['phone', 'mobile'],
+            '身份证号': ['id_card', 'card_no'],
+            '银行卡号': ['bank_card', 'card_no'],
+        }
+    
+    def test_match(self):
+        """测试字段名关键词匹配"""
+        matcher = KeywordMatcher(self.rule_keywords)
+        
+        assert matcher.match('user_phone') == {'手机号'}
+        assert matcher.match('Mobile_No') == {'手机号'}
+        # 同一关键词属于多个规则
+        assert matcher.match('card_no') == {'身份证号', '银行卡号'}
+        assert matcher.match('title') == set()
+    
+    def test_match_case_sensitive(self):
+        """测试区分大小写的匹配"""
+        matcher = KeywordMatcher(self.rule_keywords, case_sensitive=True)
+        
+        assert matcher.match('phone') == {'手机号'}
+        assert matcher.match('PHONE') == set()
+
+    
+    def test_match_without_automaton(self):
+        """测试未安装pyahocorasick时逐个关键词匹配"""
+        with patch.object(matcher_module, 'ahocorasick', None):
+            matcher = KeywordMatcher(self.rule_keywords)
+        
+        assert matcher._automaton is None
+        assert matcher.match('user_phone') == {'手机号'}
+        assert matcher.match('card_no') == {'身份证号', '银行卡号'}
+        assert matcher.match('title') == set()
+    
+    def test_match_empty_keyword(self):
+        """测试空关键词匹配任意字段名"""
+        matcher = KeywordMatcher({'全部': [''], '手机号': ['phone']})
+        
+        assert matcher.match('title') == {'全部'}
+        assert matcher.match('phone') == {'全部', '手机号'}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])